@@ -0,0 +1,70 @@
+"""
+events per second of Environment.run_once by event history mode, and the memory and garbage collector
+work of its events: bytes of one event, traced allocations per order after _initialize and collections during the run
+
+usage: python -m benchmarks.bench_events [n]
+"""
+import contextlib
+import gc
+import io
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from simulation_environment import Environment
+from event_history import HISTORY_MODES
+
+POLICY = {'policy': 'CON', 'constant': 300}
+
+
+def event_bytes(event):
+    size = sys.getsizeof(event)
+    if hasattr(event, '__dict__'):
+        size += sys.getsizeof(event.__dict__)
+    return size
+
+
+def allocations_per_order(n, seed=3):
+    env = Environment(n=n, due_date_policy_params=dict(POLICY), dispatching_rule='FIFO', seed=seed, warmup=30)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    env._initialize()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return blocks / n, event_bytes(env.event_heap._events[0])
+
+
+def events_per_second(n, rule='FIFO', seed=3, repeats=3, history='off'):
+    best, collections = None, None
+    for _ in range(repeats):
+        env = Environment(n=n, due_date_policy_params=dict(POLICY), dispatching_rule=rule, seed=seed, warmup=30,
+                          history=history)
+        gc.collect()
+        start = sum(stats['collections'] for stats in gc.get_stats())
+        with contextlib.redirect_stdout(io.StringIO()):
+            t = time.perf_counter()
+            env.run_once()
+            elapsed = time.perf_counter() - t
+        runs = sum(stats['collections'] for stats in gc.get_stats()) - start
+        # an arrival per order, and a start, a finish or a cancelation per time in the order table
+        table = env._order_table
+        events = n + sum(int(np.count_nonzero(~np.isnan(column)))
+                         for column in [table.start, table.finish, table.cancelation])
+        rate = events / elapsed
+        if best is None or rate > best:
+            best, collections = rate, runs
+    return best, collections
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    blocks, size = allocations_per_order(n)
+    print(f'n={n}: {size} bytes/event, {blocks:.1f} allocations/order after _initialize')
+    for rule in ['FIFO', 'SPT', 'BWF']:
+        for history in HISTORY_MODES:
+            rate, collections = events_per_second(n, rule, history=history)
+            print(f'{rule:>5} {history:>5}: {rate:>10.0f} events/s, {collections} gc collections')
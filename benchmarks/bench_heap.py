@@ -0,0 +1,102 @@
+"""
+push / update / pop throughput of the event heap against the former
+heapdict based implementation (skipped when heapdict is not installed)
+
+usage: python -m benchmarks.bench_heap [pending events ...]
+"""
+import random
+import sys
+import time
+
+from events import FINISH, START, ARRIVAL, CANCELATION
+from heap import MinHeap
+
+try:
+    from heapdict import heapdict
+except ImportError:
+    heapdict = None
+
+
+class BenchEvent(object):
+    # the slots of events.Event the heap uses
+    __slots__ = ('time', 'type', 'key', '_heap_index')
+
+    def __init__(self, time, type):
+        self.time = time
+        self.type = type
+
+    # comparison the former heap relied on, the type codes are the tie ranks
+    def __lt__(self, other_event):
+        return (self.time, self.type) < (other_event.time, other_event.type)
+
+
+class HeapdictMinHeap(object):
+    """
+    the former MinHeap, kept for comparison only
+    """
+    def __init__(self):
+        self._events = heapdict()
+        self._buffer = set()
+        self._occured_events = heapdict()
+
+    def update_event(self, event):
+        if (event not in self._events) and (event not in self._buffer):
+            raise Exception('the event that you are trying to update does not exist')
+        self._events[event] = event
+        if event in self._buffer:
+            self._buffer.remove(event)
+
+    def is_empty(self):
+        return len(self._events) == 0
+
+    def get_imminent_event(self):
+        event, time = self._events.popitem()
+        self._occured_events[event] = event
+        return event, event.time
+
+    def add(self, event):
+        if event.time is None:
+            self._buffer.add(event)
+        else:
+            self._events[event] = event
+
+
+def run(heap_class, n, seed=3):
+    rng = random.Random(seed)
+    types = [FINISH, START, ARRIVAL, CANCELATION]
+    events = [BenchEvent(rng.randrange(10*n), rng.choice(types)) for _ in range(n)]
+    updated = rng.sample(events, n // 2)
+    new_times = [rng.randrange(10*n) for _ in updated]
+    heap = heap_class()
+
+    timings = {}
+    t = time.perf_counter()
+    for event in events:
+        heap.add(event)
+    timings['push'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for event, new_time in zip(updated, new_times):
+        event.time = new_time
+        heap.update_event(event)
+    timings['update'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    while not heap.is_empty():
+        heap.get_imminent_event()
+    timings['pop'] = time.perf_counter() - t
+
+    return {op: count / timings[op] for op, count in [('push', n), ('update', len(updated)), ('pop', n)]}
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5, 10**6]
+    heaps = [('MinHeap', MinHeap)]
+    if heapdict is not None:
+        heaps.append(('heapdict', HeapdictMinHeap))
+
+    print(f'{"heap":>10} {"n":>9} {"push/s":>12} {"update/s":>12} {"pop/s":>12}')
+    for n in sizes:
+        for name, heap_class in heaps:
+            rates = run(heap_class, n)
+            print(f'{name:>10} {n:>9} {rates["push"]:>12.0f} {rates["update"]:>12.0f} {rates["pop"]:>12.0f}')
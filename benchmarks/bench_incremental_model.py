@@ -0,0 +1,75 @@
+"""
+solve time per rescheduling event of the optimization rule when the gurobi model is
+rebuilt on every event and when one model per queue is updated incrementally
+
+usage: python -m benchmarks.bench_incremental_model [n_orders [seed ...]]
+"""
+import io
+import sys
+import time
+import contextlib
+from collections import defaultdict
+
+import solvers
+from simulation_environment import Environment
+
+POLICIES = [{'policy': 'CON', 'constant': 300},
+            {'policy': 'SLK', 'constant': 100},
+            {'policy': 'TWK', 'moving_avg_window': 50}]
+
+
+def timed(solver_class, latencies):
+    class _TimedSolver(solver_class):
+        def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+            t = time.perf_counter()
+            c = super().solve(a, b, p, d, slk, ids=ids, start=start)
+            latencies[len(p)].append(time.perf_counter() - t)
+            return c
+    return _TimedSolver
+
+
+def run(name, n, seeds):
+    latencies = defaultdict(list)
+    solvers.SOLVERS['timed'] = timed(solvers.SOLVERS[name], latencies)
+    t = time.perf_counter()
+    for seed in seeds:
+        for params in POLICIES:
+            env = Environment(n=n, due_date_policy_params=dict(params), dispatching_rule='optimization',
+                              seed=seed, warmup=30, solver='timed')
+            with contextlib.redirect_stdout(io.StringIO()):
+                env.run_once()
+    total = time.perf_counter() - t
+    del solvers.SOLVERS['timed']
+    return latencies, total
+
+
+def main(n=1000, seeds=(1, 2, 3)):
+    if solvers.gp is None:
+        print('gurobipy is not installed, nothing to compare')
+        return
+    backends = ['gurobi', 'gurobi_incremental']
+    results = {name: run(name, n, seeds) for name in backends}
+
+    print('{:>6} {:>8}'.format('size', 'events') + ''.join(' {:>22}'.format(name + ' ms') for name in backends))
+    for size in sorted(results['gurobi'][0]):
+        row = '{:>6} {:>8}'.format(size, len(results['gurobi'][0][size]))
+        for name in backends:
+            times = results[name][0][size]
+            row += ' {:>22.3f}'.format(1000 * sum(times) / len(times)) if times else ' {:>22}'.format('-')
+        print(row)
+    for name in backends:
+        latencies, total = results[name]
+        solve = sum(sum(times) for times in latencies.values())
+        events = sum(len(times) for times in latencies.values())
+        print('{}: {:.3f} ms per event, {:.2f}s solving of {:.2f}s total'.format(
+            name, 1000 * solve / events, solve, total))
+
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:]]
+    if len(args) > 1:
+        main(args[0], args[1:])
+    elif args:
+        main(args[0])
+    else:
+        main()
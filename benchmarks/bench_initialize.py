@@ -0,0 +1,33 @@
+"""
+setup time of Environment._initialize per number of orders
+
+usage: python -m benchmarks.bench_initialize [n ...]
+"""
+import sys
+import time
+
+from rng import RandomStreams
+from scenario import Scenario
+from simulation_environment import Environment
+
+
+def time_initialize(n, seed=3):
+    env = Environment(n=n, due_date_policy_params={'policy': 'CON', 'constant': 300}, dispatching_rule='FIFO',
+                      seed=seed, warmup=30)
+    t = time.perf_counter()
+    env._initialize()
+    return time.perf_counter() - t
+
+
+def time_scenario(n, seed=3):
+    streams = RandomStreams(seed)
+    t = time.perf_counter()
+    Scenario(n, streams)
+    return time.perf_counter() - t
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    print(f'{"n":>10} {"scenario [s]":>14} {"initialize [s]":>16}')
+    for n in sizes:
+        print(f'{n:>10} {time_scenario(n):>14.3f} {time_initialize(n):>16.3f}')
@@ -0,0 +1,35 @@
+"""
+replications per second of Simulation.run and Simulation.run_lockstep on one core
+for a static dispatching rule, by number of replications
+
+usage: python -m benchmarks.bench_lockstep [n [replications ...]]
+"""
+import io
+import sys
+import time
+import contextlib
+
+from simulation_environment import Simulation
+
+
+def time_runs(n, n_sim, rule='SPT', params=None):
+    params = params or {'policy': 'SLK', 'constant': 100}
+    simulation = Simulation(seed=3, n=n, due_date_policy_params=params, dispatching_rule=rule, warmup=30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        simulation.run(n_sim, num_cores=1)
+        events = time.perf_counter() - t
+        t = time.perf_counter()
+        simulation.run_lockstep(n_sim, num_cores=1)
+        lockstep = time.perf_counter() - t
+    return events, lockstep
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if args else 2000
+    replications = args[1:] or [10, 100, 400]
+    print(f'{"n":>8} {"n_sim":>6} {"run [rep/s]":>12} {"lockstep [rep/s]":>17} {"speedup":>8}')
+    for n_sim in replications:
+        events, lockstep = time_runs(n, n_sim)
+        print(f'{n:>8} {n_sim:>6} {n_sim / events:>12.1f} {n_sim / lockstep:>17.1f} {events / lockstep:>8.1f}')
@@ -0,0 +1,46 @@
+"""
+events and orders per second of ParallelEnvironment.run_once as the number of machines grows,
+the machines have speed 1/m so the capacity of the shop and its utilization stay the same
+
+usage: python -m benchmarks.bench_machines [n [machines ...]]
+"""
+import io
+import sys
+import time
+import contextlib
+
+import numpy as np
+
+from simulation_environment import Environment, ParallelEnvironment
+from machines import QUEUE_MODES
+
+POLICY = {'policy': 'SLK', 'constant': 100}
+
+
+def time_run(n, machines, queues, rule='SPT', seed=3):
+    kwargs = dict(n=n, due_date_policy_params=dict(POLICY), dispatching_rule=rule, seed=seed, warmup=30, history='off')
+    if machines is None:
+        env = Environment(**kwargs)
+    else:
+        env = ParallelEnvironment(machines=machines, speeds=[1 / machines] * machines, queues=queues, **kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        env.run_once()
+        elapsed = time.perf_counter() - t
+        stats = env.collect_stats()
+    table = env._order_table
+    events = n + sum(int(np.count_nonzero(~np.isnan(column))) for column in [table.start, table.finish, table.cancelation])
+    return events / elapsed, n / elapsed, stats[0]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if args else 20000
+    counts = args[1:] or [1, 2, 4, 8, 16]
+    print(f'{"machines":>8} {"queues":>8} {"events/s":>10} {"orders/s":>10} {"tardiness":>10}')
+    rate, orders, tardiness = time_run(n, None, None)
+    print(f'{"single":>8} {"":>8} {rate:>10.0f} {orders:>10.0f} {tardiness:>10.3f}')
+    for machines in counts:
+        for queues in QUEUE_MODES:
+            rate, orders, tardiness = time_run(n, machines, queues)
+            print(f'{machines:>8} {queues:>8} {rate:>10.0f} {orders:>10.0f} {tardiness:>10.3f}')
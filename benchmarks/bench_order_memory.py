@@ -0,0 +1,35 @@
+"""
+traced bytes per order after Environment._initialize and after a full run
+
+usage: python -m benchmarks.bench_order_memory [n]
+"""
+import contextlib
+import gc
+import io
+import sys
+import tracemalloc
+
+from simulation_environment import Environment
+
+
+def bytes_per_order(n, seed=3):
+    env = Environment(n=n, due_date_policy_params={'policy': 'CON', 'constant': 300}, dispatching_rule='FIFO',
+                      seed=seed, warmup=30)
+    gc.collect()
+    tracemalloc.start()
+    env._initialize()
+    gc.collect()
+    after_initialize, _ = tracemalloc.get_traced_memory()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        env._run_events(None, False)
+    gc.collect()
+    after_run, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after_initialize / n, after_run / n
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    after_initialize, after_run = bytes_per_order(n)
+    print(f'n={n}: {after_initialize:.0f} bytes/order after _initialize, {after_run:.0f} bytes/order after run')
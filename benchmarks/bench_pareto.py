@@ -0,0 +1,29 @@
+"""
+seconds of utils.pareto.non_dominated_ranks on random points, by number of points and objectives
+
+usage: python -m benchmarks.bench_pareto [n [objectives ...]]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.pareto import non_dominated_ranks
+
+
+def time_ranks(n, m, seed=3, strict=False):
+    points = np.random.default_rng(seed).random((n, m))
+    t = time.perf_counter()
+    ranks = non_dominated_ranks(points, strict=strict)
+    return time.perf_counter() - t, int(ranks.max()) + 1
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if args else 10**5
+    objectives = args[1:] or [2, 3, 4]
+    print(f'{"n":>8} {"m":>3} {"fronts":>7} {"weak [s]":>9} {"strict [s]":>11}')
+    for m in objectives:
+        weak, fronts = time_ranks(n, m)
+        strict, _ = time_ranks(n, m, strict=True)
+        print(f'{n:>8} {m:>3} {fronts:>7} {weak:>9.3f} {strict:>11.3f}')
@@ -0,0 +1,70 @@
+"""
+cost of one due date quote (tentative insert + reschedule + rejection) and one
+cancelation on a JobQueue holding q orders, for the static dispatching rules
+
+usage: python -m benchmarks.bench_queue [q ...]
+"""
+import sys
+import time
+
+from due_date_policies import CON
+from order import OrderTable
+from rng import RandomStreams
+from scenario import Scenario
+from schedule import JobQueue, STATIC_RULES
+
+
+class _Environment(object):
+    """
+    just enough of an Environment to create orders without events
+    """
+    class _Heap(object):
+        def add(self, event):
+            pass
+
+    event_heap = _Heap()
+
+
+def build_queue(rule, q, incremental, seed=3):
+    table = OrderTable(Scenario(q + 1000, RandomStreams(seed)), dispatching_rule=rule, env=_Environment())
+    orders = table.create_orders()
+    queue = JobQueue(rule, due_date_assigner=CON(300), incremental=incremental)
+    for i in range(q):
+        queue.add_order(orders[i])
+        queue.reschedule(due_date_params=False)
+        queue.set_schedule(confirm=True)
+    return queue, [orders[i] for i in range(q, q + 1000)]
+
+
+def time_ops(rule, q, incremental):
+    queue, new_orders = build_queue(rule, q, incremental)
+    t = time.perf_counter()
+    for order in new_orders:
+        queue.add_order(order)
+        queue.reschedule(due_date_params=True)
+        queue.set_schedule(confirm=False)
+    quote = (time.perf_counter() - t) / len(new_orders)
+
+    cancel = 0
+    for order in new_orders:
+        queue.add_order(order)
+        queue.reschedule(due_date_params=False)
+        queue.set_schedule(confirm=True)
+        t = time.perf_counter()
+        queue.remove_order(order)
+        queue.reschedule(due_date_params=False)
+        queue.set_schedule(confirm=True)
+        cancel += time.perf_counter() - t
+    cancel /= len(new_orders)
+    return quote, cancel
+
+
+if __name__ == '__main__':
+    depths = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    print(f'{"rule":>5} {"q":>6} {"mode":>12} {"quote [us]":>12} {"cancel [us]":>12}')
+    for rule in STATIC_RULES:
+        for q in depths:
+            for incremental in [False, True]:
+                quote, cancel = time_ops(rule, q, incremental)
+                mode = 'incremental' if incremental else 'sort'
+                print(f'{rule:>5} {q:>6} {mode:>12} {1e6*quote:>12.1f} {1e6*cancel:>12.1f}')
@@ -0,0 +1,51 @@
+"""
+replications and seconds of Sweep.run and Sweep.race over the static rules and the due date policy grid,
+and the points of the full frontier that racing dropped
+
+usage: python -m benchmarks.bench_racing [n [n_sim]]
+"""
+import io
+import sys
+import time
+import contextlib
+
+import numpy as np
+
+from sweep import Sweep
+from utils.model_params import due_date_policy_grid
+from utils.pareto import pareto_front
+
+OBJECTIVES = ['tardiness_proportion', 'rejection_proportion']
+
+
+def frontier(points, summaries):
+    means = np.array([[summary[name]['mean'] for name in OBJECTIVES] for summary in summaries])
+    return {(point['dispatching_rule'], str(point['due_date_policy_params']))
+            for point, on_front in zip(points, pareto_front(means)) if on_front}
+
+
+def run(n, n_sim, seed=3):
+    points = [{'n': n, 'due_date_policy_params': params, 'dispatching_rule': rule, 'warmup': 30}
+              for rule in ['FIFO', 'SPT', 'BWF'] for params in due_date_policy_grid()]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        summaries = Sweep(seed=seed, points=points, num_cores=1).run(n_sim=n_sim)
+        full = time.perf_counter() - t
+        t = time.perf_counter()
+        race_points, race_summaries = Sweep(seed=seed, points=points, num_cores=1).race(max_sim=n_sim, refine=0)
+        race = time.perf_counter() - t
+    left = [(point, summary) for point, summary in zip(race_points, race_summaries) if not summary['eliminated']]
+    dropped = frontier(points, summaries) - frontier(*zip(*left))
+    replications = sum(summary['replications'] for summary in race_summaries)
+    return (len(points) * n_sim, full), (replications, race), dropped
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if len(args) > 0 else 1000
+    n_sim = args[1] if len(args) > 1 else 16
+    (full_replications, full), (race_replications, race), dropped = run(n, n_sim)
+    print(f'{"":>6} {"replications":>13} {"seconds":>9}')
+    print(f'{"run":>6} {full_replications:>13} {full:>9.1f}')
+    print(f'{"race":>6} {race_replications:>13} {race:>9.1f}')
+    print(f'frontier points dropped by racing: {sorted(dropped) or "none"}')
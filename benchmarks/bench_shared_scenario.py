@@ -0,0 +1,60 @@
+"""
+per replication setup time of the order table when the scenario is generated in the worker
+and when the worker attaches to a scenario published in shared memory, and the setup time
+this saves over the sweep of utils/model_params.py, creating the Order views and their
+events is the same in both cases and reported on its own
+
+usage: python -m benchmarks.bench_shared_scenario [n ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+import shared_scenario
+from order import OrderTable
+from rng import RandomStreams
+from scenario import Scenario
+from utils.model_params import get_simulation_params, dispatching_rule_grid, due_date_policy_grid
+
+
+class _Environment(object):
+    class _Heap(object):
+        def add(self, event):
+            pass
+
+    event_heap = _Heap()
+
+
+def time_setup(n, repeats=5):
+    seeds = np.random.SeedSequence(3).spawn(repeats)
+    generate, attach, orders = [], [], []
+    for seed in seeds:
+        t = time.perf_counter()
+        OrderTable(Scenario(n, RandomStreams(seed)), dispatching_rule='FIFO', env=_Environment())
+        generate.append(time.perf_counter() - t)
+
+        block, descriptor = shared_scenario.publish(Scenario(n, RandomStreams(seed)))
+        t = time.perf_counter()
+        table = OrderTable(shared_scenario.attach(descriptor), dispatching_rule='FIFO', env=_Environment())
+        attach.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        table.create_orders()
+        orders.append(time.perf_counter() - t)
+        del table
+        shared_scenario._attached.pop(descriptor['name']).close()
+        block.close()
+        block.unlink()
+    return min(generate), min(attach), min(orders)
+
+
+if __name__ == '__main__':
+    seed, n, simulation_time, warmup, n_sim = get_simulation_params()
+    points = len(list(dispatching_rule_grid())) * len(list(due_date_policy_grid()))
+    sizes = [int(arg) for arg in sys.argv[1:]] or [n]
+    print(f'{"n":>10} {"generate [ms]":>14} {"attach [ms]":>12} {"orders [ms]":>12} {"saved per sweep [s]":>20}')
+    for size in sizes:
+        generate, attach, orders = time_setup(size)
+        # every point but the first attaches instead of generating
+        saved = (points - 1) * n_sim * (generate - attach)
+        print(f'{size:>10} {1000 * generate:>14.2f} {1000 * attach:>12.2f} {1000 * orders:>12.2f} {saved:>20.2f}')
@@ -0,0 +1,123 @@
+"""
+records the queue snapshots the optimization rule solves during a few simulation runs,
+then solves them again with every backend and reports the solve latency by queue size
+and how far the objectives are from the gurobi backend
+
+the queues of the simulation rarely hold more than a handful of orders, so larger snapshots
+are put together from jobs of the recorded ones to see how the backends scale
+
+usage: python -m benchmarks.bench_solver [n_orders [seed ...]]
+"""
+import io
+import sys
+import random
+import time
+import contextlib
+from collections import defaultdict
+
+import solvers
+from simulation_environment import Environment
+from utils.env_variables import OptimizationParameters
+
+POLICIES = [{'policy': 'CON', 'constant': 300},
+            {'policy': 'SLK', 'constant': 100},
+            {'policy': 'TWK', 'moving_avg_window': 50}]
+
+
+class _RecordingSolver(solvers.BranchAndBoundSolver):
+    snapshots = []
+
+    def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+        self.snapshots.append((list(a), list(b), list(p), [float(x) for x in d], slk))
+        return super().solve(a, b, p, d, slk, ids=ids, start=start)
+
+
+def record_snapshots(n, seeds):
+    solvers.SOLVERS['record'] = _RecordingSolver
+    for seed in seeds:
+        for params in POLICIES:
+            env = Environment(n=n, due_date_policy_params=dict(params), dispatching_rule='optimization',
+                              seed=seed, warmup=30, solver='record')
+            with contextlib.redirect_stdout(io.StringIO()):
+                env.run_once()
+    del solvers.SOLVERS['record']
+    return _RecordingSolver.snapshots
+
+
+def combine_snapshots(snapshots, sizes=(8, 10), count=5, seed=0):
+    """
+    snapshots of the given sizes made of jobs drawn from the recorded snapshots,
+    with due dates spread over the longer queue
+    """
+    rng = random.Random(seed)
+    jobs = [(a[i], b[i], p[i]) for a, b, p, d, slk in snapshots for i in range(len(p))]
+    average_p = sum(job[2] for job in jobs) / len(jobs)
+    combined = []
+    for size in sizes:
+        for _ in range(count):
+            picked = rng.sample(jobs, size)
+            a = [job[0] for job in picked]
+            b = [job[1] for job in picked]
+            p = [job[2] for job in picked]
+            d = [rng.uniform(-1, size / 2) * average_p for _ in picked]
+            combined.append((a, b, p, d, False))
+            combined.append((a, b, p, d[:-1], True))
+    return combined
+
+
+def objective(a, b, p, d, slk, c):
+    weights, due_dates = solvers.get_costs(a, b, d, slk)
+    return sum(w * max(0, ci - di) for w, ci, di in zip(weights, c, due_dates))
+
+
+def main(n=1000, seeds=(1, 2, 3)):
+    snapshots = record_snapshots(n, seeds)
+    print('{} snapshots from {} runs'.format(len(snapshots), len(seeds) * len(POLICIES)))
+    snapshots += combine_snapshots(snapshots)
+
+    backends = ['branch_and_bound']
+    if solvers.gp is not None:
+        backends.insert(0, 'gurobi')
+    else:
+        print('gurobipy is not installed, comparing against gurobi is skipped')
+
+    gap = OptimizationParameters.get_opt_gap()
+    latencies = {name: defaultdict(list) for name in backends}
+    values = {name: [] for name in backends}
+    for name in backends:
+        solver = solvers.get_solver(name)
+        for a, b, p, d, slk in snapshots:
+            with contextlib.redirect_stdout(io.StringIO()):
+                t = time.perf_counter()
+                c = solver.solve(a, b, p, d, slk)
+            latencies[name][len(p)].append(time.perf_counter() - t)
+            values[name].append(objective(a, b, p, d, slk, c))
+
+    print('{:>6} {:>8}'.format('size', 'count') + ''.join(' {:>18}'.format(name + ' ms') for name in backends))
+    sizes = sorted(latencies[backends[0]])
+    for size in sizes:
+        row = '{:>6} {:>8}'.format(size, len(latencies[backends[0]][size]))
+        for name in backends:
+            times = latencies[name][size]
+            row += ' {:>18.3f}'.format(1000 * sum(times) / len(times))
+        print(row)
+
+    if 'gurobi' in backends:
+        worse = 0
+        worst = 0.0
+        for reference, value in zip(values['gurobi'], values['branch_and_bound']):
+            excess = (value - reference) / max(reference, 1)
+            worst = max(worst, excess)
+            worse += excess > gap
+        print('branch_and_bound vs gurobi: worst relative excess {:.4f}, {} of {} above the gap {}'.format(
+            worst, worse, len(snapshots), gap))
+
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:]]
+    if len(args) > 1:
+        main(args[0], args[1:])
+    elif args:
+        main(args[0])
+    else:
+        main()
@@ -0,0 +1,44 @@
+"""
+run time of a replication with and without the event trace, and the size of the trace
+
+usage: python -m benchmarks.bench_trace [n ...]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from simulation_environment import Environment
+from event_trace import load_trace
+
+
+def time_run(n, rule, trace=None):
+    env = Environment(n=n, due_date_policy_params={'policy': 'SLK', 'constant': 100}, dispatching_rule=rule,
+                      seed=3, warmup=30, trace=trace)
+    t = time.perf_counter()
+    env.run_once()
+    return time.perf_counter() - t
+
+
+def time_runs(n, rule, path, repeats=5):
+    """
+    best times without and with the trace, the runs alternate so both see the same machine load
+    """
+    off, on = float('inf'), float('inf')
+    for _ in range(repeats):
+        off = min(off, time_run(n, rule))
+        on = min(on, time_run(n, rule, trace=path))
+    return off, on
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20000]
+    path = os.path.join(tempfile.mkdtemp(), 'trace.bin')
+    print(f'{"n":>8} {"rule":>6} {"off [s]":>9} {"on [s]":>9} {"overhead":>9} {"events":>9} {"trace [MB]":>11}')
+    for n in sizes:
+        for rule in ['FIFO', 'SPT', 'BWF']:
+            off, on = time_runs(n, rule, path)
+            events = len(load_trace(path))
+            print(f'{n:>8} {rule:>6} {off:>9.3f} {on:>9.3f} {on / off - 1:>9.1%} {events:>9} '
+                  f'{os.path.getsize(path) / 1e6:>11.2f}')
+    os.remove(path)
@@ -0,0 +1,215 @@
+"""
+fixed seed timings of order generation, the event loop, the event heap, rescheduling and the stats,
+written as json with the machine they ran on so the results of two commits can be compared
+
+usage: python -m benchmarks.suite run [--quick] [--output results.json]
+       python -m benchmarks.suite compare base.json new.json [--threshold 0.1]
+
+compare lists the cases that got slower by more than the threshold and exits with 1 if there are any,
+the gurobi cases are skipped when gurobipy is not installed
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import subprocess
+import contextlib
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+import solvers
+from due_date_policies import CON
+from schedule import JobQueue, STATIC_RULES
+from simulation_environment import Environment
+from heap import MinHeap
+from order import OrderTable
+from rng import RandomStreams
+from scenario import Scenario
+from benchmarks.bench_heap import run as run_heap
+from benchmarks.bench_initialize import time_initialize
+from benchmarks.bench_queue import time_ops, _Environment
+
+SEED = 3
+POLICIES = [{'policy': 'CON', 'constant': 300},
+            {'policy': 'SLK', 'constant': 100},
+            {'policy': 'TWK', 'moving_avg_window': 50},
+            {'policy': 'QNT', 'quantile': 0.8, 'half_life': 100}]
+# n of the run_once cases, the optimization rule solves a model per arrival so it runs fewer orders
+SIZES = {'full': [2000, 10000], 'quick': [2000]}
+OPTIMIZATION_SIZES = {'full': [200], 'quick': [100]}
+HEAP_SIZES = {'full': [10**4, 10**5], 'quick': [10**4]}
+QUEUE_DEPTHS = {'full': [10, 100, 1000], 'quick': [10, 100]}
+OPTIMIZE_DEPTHS = {'full': [4, 8], 'quick': [4]}
+REPEATS = {'full': 5, 'quick': 3}
+
+
+def best_of(function, repeats):
+    """
+    smallest of the timings function returns, the least disturbed run
+    """
+    return min(function() for _ in range(repeats))
+
+
+def time_run_once(n, rule, params, solver=None):
+    env = Environment(n=n, due_date_policy_params=dict(params), dispatching_rule=rule, seed=SEED, warmup=30,
+                      solver=solver)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        env.run_once()
+        return time.perf_counter() - t
+
+
+def time_stats(n):
+    env = Environment(n=n, due_date_policy_params=dict(POLICIES[0]), dispatching_rule='FIFO', seed=SEED, warmup=30)
+    env.run_once()
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        env.collect_stats()
+        collect = time.perf_counter() - t
+    t = time.perf_counter()
+    env.show_stats()
+    return collect, time.perf_counter() - t
+
+
+def time_optimize(q, solver, quotes=20):
+    """
+    one due date quote of the optimization rule on a queue of q confirmed orders
+    """
+    table = OrderTable(Scenario(q + quotes, RandomStreams(SEED)), dispatching_rule='optimization', env=_Environment())
+    orders = list(table.create_orders().values())
+    queue = JobQueue('optimization', due_date_assigner=CON(300), incremental=False, solver=solver)
+    for k, order in enumerate(orders[:q]):
+        order._due_date = 300 + 100 * k
+        queue.add_order(order)
+    # confirmed in arrival order, the next job at the end
+    queue._sequence = list(reversed(orders[:q]))
+    t = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for order in orders[q:q + quotes]:
+            queue.add_order(order)
+            queue.reschedule(due_date_params=True, expected_remaining_time_on_machine=0, time_now=0)
+            queue.set_schedule(confirm=False)
+    return (time.perf_counter() - t) / quotes
+
+
+def get_solver_names() -> list:
+    names = ['branch_and_bound']
+    if solvers.gp is not None:
+        names += ['gurobi', 'gurobi_incremental']
+    return names
+
+
+def run_suite(mode='full') -> dict:
+    """
+    seconds per case, names are '<what>/<parameters>'
+    """
+    repeats = REPEATS[mode]
+    # the first run pays for lazy imports and allocations, it is not measured
+    time_run_once(SIZES[mode][0], 'FIFO', POLICIES[0])
+    results = {}
+    for n in SIZES[mode]:
+        results[f'initialize/n={n}'] = best_of(lambda: time_initialize(n, seed=SEED), repeats)
+    for n in SIZES[mode]:
+        for rule in STATIC_RULES:
+            for params in POLICIES:
+                results[f'run_once/{rule}/{params["policy"]}/n={n}'] = best_of(
+                    lambda: time_run_once(n, rule, params), repeats)
+    for n in OPTIMIZATION_SIZES[mode]:
+        for solver in get_solver_names():
+            for params in POLICIES:
+                results[f'run_once/optimization/{solver}/{params["policy"]}/n={n}'] = best_of(
+                    lambda: time_run_once(n, 'optimization', params, solver=solver), repeats)
+    for n in HEAP_SIZES[mode]:
+        for op, rate in run_heap(MinHeap, n, seed=SEED).items():
+            results[f'heap/{op}/n={n}'] = 1 / rate
+    for rule in STATIC_RULES:
+        for q in QUEUE_DEPTHS[mode]:
+            quote, cancel = np.min([time_ops(rule, q, incremental=True) for _ in range(repeats)], axis=0)
+            results[f'reschedule/{rule}/quote/q={q}'] = float(quote)
+            results[f'reschedule/{rule}/cancel/q={q}'] = float(cancel)
+    for solver in get_solver_names():
+        for q in OPTIMIZE_DEPTHS[mode]:
+            results[f'optimize/{solver}/q={q}'] = best_of(lambda: time_optimize(q, solver), repeats)
+    for n in SIZES[mode]:
+        collect, show = np.min([time_stats(n) for _ in range(repeats)], axis=0)
+        results[f'collect_stats/n={n}'] = float(collect)
+        results[f'show_stats/n={n}'] = float(show)
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def get_machine() -> dict:
+    return {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': multiprocessing.cpu_count(),
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'gurobipy': None if solvers.gp is None else '.'.join(str(x) for x in solvers.gp.gurobi.version())}
+
+
+def compare(base, new) -> list:
+    """
+    (case, base seconds, new seconds, ratio) of the cases in both results, slowest ratio first
+    """
+    rows = []
+    for name, seconds in new['results'].items():
+        if name in base['results']:
+            rows.append((name, base['results'][name], seconds, seconds / base['results'][name]))
+    return sorted(rows, key=lambda row: -row[3])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run')
+    run.add_argument('--quick', action='store_true', help='fewer sizes and repeats')
+    run.add_argument('--output', default=None, help='json file, bench_<commit>.json by default')
+    diff = commands.add_parser('compare')
+    diff.add_argument('base')
+    diff.add_argument('new')
+    diff.add_argument('--threshold', type=float, default=0.1, help='relative slowdown flagged as a regression')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        mode = 'quick' if args.quick else 'full'
+        if solvers.gp is None:
+            print('gurobipy is not installed, the gurobi cases are skipped')
+        commit = get_commit()
+        results = run_suite(mode)
+        output = args.output or f'bench_{commit or "local"}.json'
+        with open(output, 'w') as f:
+            json.dump({'commit': commit, 'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'mode': mode, 'seed': SEED, 'machine': get_machine(), 'results': results}, f, indent=2)
+        for name, seconds in results.items():
+            print(f'{name:<50} {1e3 * seconds:>12.4f} ms')
+        print(f'written to {output}')
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if base['machine'] != new['machine']:
+        print('the results come from different machines, the ratios are not comparable')
+    rows = compare(base, new)
+    regressions = [row for row in rows if row[3] > 1 + args.threshold]
+    print(f'{"case":<50} {"base [ms]":>12} {"new [ms]":>12} {"ratio":>7}')
+    for name, old, seconds, ratio in rows:
+        flag = ' <' if ratio > 1 + args.threshold else ''
+        print(f'{name:<50} {1e3 * old:>12.4f} {1e3 * seconds:>12.4f} {ratio:>7.2f}{flag}')
+    print(f'{len(regressions)} of {len(rows)} cases slower by more than {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
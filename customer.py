@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.stats import norm
 from utils.env_variables import CustomerParameters
 
 
@@ -10,26 +9,15 @@ class Customer(object):
         """
         self._type = customer_type
         self._reliability, self._rejection_coefficient, self._weight_coefficient = CustomerParameters.get_params(customer_type)
-
-        self._cancelation_time = None
         
     def get_type(self):
         return self._type
     
-    def cancels_order(self) -> int:
-        if np.random.random() > self._reliability:
-            self._cancelation_time = CustomerParameters.get_cancelation_time(self._type)
-        return self._cancelation_time
-        
-#     def get_cancelation_time(self):
-#         return self._cancelation_time
-    
     def get_reliability(self):
         return self._reliability
     
-    def rejects_due_date(self, due_date) -> bool:
-        return np.random.random() < 1-np.exp(-self._rejection_coefficient*due_date)
-    
-    def get_weight_coefficient(self) -> float:
-        mean, std = self._weight_coefficient
-        return norm.rvs(loc=mean, scale=std, size=1)[0]
\ No newline at end of file
+    def rejects_due_date(self, due_date, draw) -> bool:
+        """
+        draw is the order's uniform random number for the decision
+        """
+        return draw < 1-np.exp(-self._rejection_coefficient*due_date)
\ No newline at end of file
@@ -1,5 +1,7 @@
 from collections import deque
 
+import numpy as np
+
 class DueDatePolicy(object):
     def __init__(self, policy):
         self.policy = policy
@@ -47,6 +49,9 @@ class TWK(DueDatePolicy):
         super().__init__('TWK')
         self._ma_window = moving_avg_window
         self._coefficients = deque()
+        # running sum of the window, summed again once per window of updates so the rounding errors do not pile up
+        self._sum = 0.0
+        self._updates = 0
     
 #     def _define_env(self, environment):
 #         self._environment = environment
@@ -56,8 +61,13 @@ class TWK(DueDatePolicy):
         
         coefficient = ((order._finish_time - order._arrival_time)/(order._process_time))
         self._coefficients.append(coefficient)        
+        self._sum += coefficient
         if len(self._coefficients) > self._ma_window:
-            self._coefficients.popleft()
+            self._sum -= self._coefficients.popleft()
+        self._updates += 1
+        if self._updates >= self._ma_window:
+            self._sum = sum(self._coefficients)
+            self._updates = 0
 
     def _calculate_due_date(self, **kwargs):
         time_now = kwargs['time_now']
@@ -67,8 +77,95 @@ class TWK(DueDatePolicy):
     def _get_average_coefficient(self):
         if len(self._coefficients) == 0:
             return 1.0  # Default value if no coefficients are available
-        return sum(self._coefficients) / len(self._coefficients)
+        return self._sum / len(self._coefficients)
     
     def get_params(self):
         params = {'policy': 'TWK', 'moving_average': self._ma_window}
-        return params
\ No newline at end of file
+        return params
+
+
+class QuantileSketch(object):
+    # flow time ratios are at least 1, the bins grow geometrically up to MAX_RATIO
+    BINS = 128
+    MAX_RATIO = 1000.0
+
+    def __init__(self, half_life):
+        """
+        fixed memory histogram of the values added so far, a value counts half as much
+        after half_life newer values (exponential decay), the newest value has the largest weight
+        so the older ones do not have to be decayed one by one
+        """
+        self._growth = np.log(self.MAX_RATIO) / (self.BINS - 1)
+        self._decay = 0.5 ** (-1 / half_life)
+        self._weights = np.zeros(self.BINS)
+        self._weight = 1.0 # of the next value
+        self.count = 0
+
+    def add(self, value) -> None:
+        i = min(self.BINS - 1, max(0, int(np.log(value) / self._growth))) if value > 1 else 0
+        self._weights[i] += self._weight
+        self._weight *= self._decay
+        self.count += 1
+        if self._weight > 1e100:
+            # the relative weights are what counts, rescaled before they overflow
+            self._weights /= self._weight
+            self._weight = 1.0
+
+    def quantile(self, q) -> float:
+        """
+        value below which q of the weight lies, interpolated geometrically within its bin
+        """
+        cumulative = np.cumsum(self._weights)
+        target = q * cumulative[-1]
+        i = min(self.BINS - 1, int(np.searchsorted(cumulative, target)))
+        below = cumulative[i] - self._weights[i]
+        fraction = (target - below) / self._weights[i] if self._weights[i] > 0 else 0.0
+        return float(np.exp(self._growth * (i + fraction)))
+
+
+class QNT(DueDatePolicy):
+    def __init__(self, quantile=0.8, half_life=100, by=None):
+        """
+        due dates from the quantile of the flow time ratios (flow time / process time) of the recently
+        finished orders, the quote is the expected process time times the ratio, so quantile is the share
+        of orders like the recent ones that would have been on time, with by='product' or 'customer'
+        the ratios of the orders of the same product or customer type are used once there are some
+        """
+        super().__init__('QNT')
+        if by not in [None, 'product', 'customer']:
+            raise ValueError('by must be None, product or customer, not {}'.format(by))
+        self.quantile = quantile
+        self.half_life = half_life
+        self.by = by
+        self._sketch = QuantileSketch(half_life)
+        self._sketches = {}
+
+    def _key(self, order):
+        # the type, a time bounded run creates new product and customer objects for every block of orders
+        return order._product._type if self.by == 'product' else order._customer._type
+
+    def _add_order(self, order):
+        ratio = (order._finish_time - order._arrival_time)/(order._process_time)
+        self._sketch.add(ratio)
+        if self.by is not None:
+            key = self._key(order)
+            if key not in self._sketches:
+                self._sketches[key] = QuantileSketch(self.half_life)
+            self._sketches[key].add(ratio)
+
+    def _get_ratio(self, order):
+        sketch = self._sketch
+        if self.by is not None and order is not None:
+            sketch = self._sketches.get(self._key(order), sketch)
+        if sketch.count == 0:
+            return 1.0
+        return sketch.quantile(self.quantile)
+
+    def _calculate_due_date(self, **kwargs):
+        time_now = kwargs['time_now']
+        expected_process_time = kwargs['expected_process_time']
+        return time_now + expected_process_time * self._get_ratio(kwargs.get('order'))
+
+    def get_params(self):
+        params = {'policy': 'QNT', 'quantile': self.quantile, 'half_life': self.half_life, 'by': self.by}
+        return params
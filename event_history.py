@@ -0,0 +1,83 @@
+"""
+the events that occured in a replication, kept by the event heap as they are popped,
+either the last size events in a ring or all of them, as columns of preallocated arrays
+"""
+import numpy as np
+import pandas as pd
+
+from events import TYPE_NAMES
+
+HISTORY_MODES = ['off', 'ring', 'full']
+# events a ring keeps by default, and the events per chunk of a full history
+RING_SIZE = 1024
+CHUNK_SIZE = 65536
+
+
+class EventHistory(object):
+    def __init__(self, mode='full', size=RING_SIZE):
+        """
+        columns of (time, type code, order id, accepted) per event, copied from the order when the event
+        is recorded so that the history holds no orders or order tables, a ring overwrites its oldest event,
+        a full history adds chunks as it grows
+        """
+        if mode not in ['ring', 'full']:
+            raise ValueError(f'mode must be ring or full, not {mode}')
+        self.mode = mode
+        self._chunk_size = size if mode == 'ring' else CHUNK_SIZE
+        self._chunks = []
+        self._size = self._chunk_size # events in the last chunk
+        self.count = 0
+        # the order of an arrival is accepted or rejected after the event is recorded, so the flag of the
+        # last event is only copied from its order when the next one is recorded or the history is shown
+        self._pending_order = None
+        self._pending_accepted = None
+        self._pending_index = 0
+        self._add_chunk()
+
+    def _add_chunk(self) -> None:
+        size = self._chunk_size
+        self._chunks.append((np.empty(size), np.empty(size, dtype=np.uint8), np.empty(size, dtype=np.int64),
+                             np.empty(size, dtype=bool)))
+        self._time, self._type, self._order, self._accepted = self._chunks[-1]
+        self._size = 0
+
+    def _settle(self) -> None:
+        order = self._pending_order
+        if order is not None:
+            self._pending_accepted[self._pending_index] = order._due_date is not None
+            self._pending_order = None
+
+    def record(self, event) -> None:
+        self._settle()
+        if self._size == self._chunk_size:
+            if self.mode == 'ring':
+                self._size = 0
+            else:
+                self._add_chunk()
+        order = event.order
+        i = self._size
+        self._time[i] = event.time
+        self._type[i] = event.type
+        self._order[i] = order._id
+        self._pending_order, self._pending_accepted, self._pending_index = order, self._accepted, i
+        self._size = i + 1
+        self.count += 1
+
+    def _columns(self) -> tuple:
+        self._settle()
+        if self.mode == 'ring':
+            # oldest first, the ring wrapped around once count passed its size
+            start = self.count % self._chunk_size if self.count > self._chunk_size else 0
+            order = np.roll(np.arange(min(self.count, self._chunk_size)), -start)
+            return tuple(column[order] for column in self._chunks[0])
+        chunks = self._chunks[:-1] + [tuple(column[:self._size] for column in self._chunks[-1])]
+        return tuple(np.concatenate(columns) for columns in zip(*chunks))
+
+    def to_frame(self) -> pd.DataFrame:
+        time, type, order, accepted = self._columns()
+        return pd.DataFrame({'time': time, 'type': np.array(TYPE_NAMES, dtype=object)[type], 'order': order,
+                             'accepted': accepted})
+
+
+def empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({'time': [], 'type': [], 'order': [], 'accepted': []})
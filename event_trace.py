@@ -0,0 +1,75 @@
+"""
+binary trace of the events of a replication, one fixed width record per event
+written through a preallocated buffer, read back as a structured array
+
+usage: python -m event_trace path [rows]   prints the first rows of a trace
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from events import TYPE_NAMES
+
+# machine job of the records when the machine is idle
+IDLE = -1
+# records kept in memory before they are written to the file
+CHUNK_SIZE = 65536
+
+TRACE_DTYPE = np.dtype([('time', np.float64), ('type', np.uint8), ('order', np.int64),
+                        ('queue', np.int32), ('machine', np.int64)])
+
+
+class TraceRecorder(object):
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        """
+        appends (time, event type, order id, queue length, job on the machine) records to path,
+        the type is the code of the event type in events.py
+        """
+        self.path = path
+        self._file = open(path, 'wb')
+        self._buffer = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self._size = 0
+        self.count = 0
+
+    def record(self, time, type, order, queue, machine) -> None:
+        self._buffer[self._size] = (time, type, order, queue, machine)
+        self._size += 1
+        if self._size == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        self._buffer[:self._size].tofile(self._file)
+        self.count += self._size
+        self._size = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+def load_trace(path) -> np.ndarray:
+    """
+    the records of a trace as a read only structured array mapped from the file
+    """
+    if os.path.getsize(path) == 0:
+        # an empty file cannot be mapped
+        return np.empty(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode='r')
+
+
+def to_frame(trace) -> pd.DataFrame:
+    df = pd.DataFrame({name: np.asarray(trace[name]) for name in TRACE_DTYPE.names})
+    df['type'] = df['type'].map(dict(enumerate(TYPE_NAMES)))
+    df['machine'] = df['machine'].mask(df['machine'] == IDLE).astype('Int64')
+    return df
+
+
+if __name__ == '__main__':
+    trace = load_trace(sys.argv[1])
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f'{len(trace)} events')
+    print(to_frame(trace[:rows]).to_string())
@@ -1,88 +1,69 @@
+# event types, the codes are also the tie ranks at equal times: finish < start < arrival < cancelation
+FINISH, START, ARRIVAL, CANCELATION = 0, 1, 2, 3
+TYPE_NAMES = ('finish', 'start', 'arrival', 'cancelation')
+
+
 class Event(object):
+    """
+    an event of an order, the environment handles it by its type when it occurs,
+    key is the (time, type, insertion sequence) tuple the heap orders events by
+    """
+    __slots__ = ('time', 'order', 'heap', 'key', '_heap_index')
+    type = None
+    occurance_time_fixed = False
+
     def __init__(self, time, order):
         self.time = time
         self.order = order
-        self.occurance_time_fixed = False
-        self.type = None
-        
-        self.environment = self.order._environment
-        self.heap = self.environment.event_heap
+        self.heap = order._environment.event_heap
         self.heap.add(self)
-        
+
     def update_time(self, time):
-        if self.type in ['arrival', 'cancelation']:
-            raise Exception('occurance times for order arrival and cancelation events are set at initialization!')
         if self.occurance_time_fixed:
-            raise Exception('occurance time was fixed for this event, it cannot be updated!')
-        
+            raise Exception('occurance times for order arrival and cancelation events are set at initialization!')
+
         if time != self.time:
             self.time = time
             self.heap.update_event(self)
-        
-    def occur(self):
-        raise NotImplementedError('Event is an abstract class')
-        
+
     def __lt__(self, other_event):
-        if self.time == other_event.time:
-            if self.type == 'finish':
-                return True
-            if self.type == 'start':
-                return other_event.type != 'finish'
-            if self.type == 'arrival':
-                return other_event.type not in ['start', 'finish']
-            return False
-        return self.time < other_event.time
-    
+        return (self.time, self.type) < (other_event.time, other_event.type)
+
     def __repr__(self):
-        info = {'type': self.type, 'order': self.order._id, 'time': self.time}
+        info = {'type': TYPE_NAMES[self.type], 'order': self.order._id, 'time': self.time}
         stringified = ""
         for k, v in info.items():
             stringified += f"{k}: {v}\n"
         return f"({stringified})"
-    
-    def __del__(self):
-        pass
-    
+
     def remove(self):
         self.heap.remove(self)
 
+    def defer(self):
+        """
+        unschedules the event until its time is updated again
+        """
+        self.heap.defer(self)
+        self.time = None
+
 
 class OrderArrival(Event):
-    def __init__(self, time, order):
-        super().__init__(time, order)
-        self.type = 'arrival'
-        self.occurance_time_fixed = True
-        
-    def occur(self):
-        self.environment.arrival(self.order)
+    __slots__ = ()
+    type = ARRIVAL
+    occurance_time_fixed = True
+
 
 class OrderCancelation(Event):
-    def __init__(self, time, order):
-        super().__init__(time, order)
-        self.type = 'cancelation'
-        self.occurance_time_fixed = True
-        
-    def occur(self):
-        self.order.cancel()
-        #self.environment.cancelation(self)
-        self.environment.cancelation(self.order)
+    __slots__ = ()
+    type = CANCELATION
+    occurance_time_fixed = True
+
 
 class JobStart(Event):
-    def __init__(self, time, order):
-        super().__init__(time, order)
-        self.type = 'start'
-        
-    def occur(self):
-        self.order._start_time = self.time
-        self.order.prevent_cancelation()
-        self.environment.start_job(self.order)
-        
-class JobFinish(Event):
-    def __init__(self, time, order):
-        super().__init__(time, order)
-        self.type = 'finish'
-    
-    def occur(self):
-        self.order._finish_time = self.time
-        self.environment.finish_job()
+    __slots__ = ()
+    type = START
 
+
+class JobFinish(Event):
+    __slots__ = ()
+    type = FINISH
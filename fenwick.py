@@ -0,0 +1,59 @@
+class SparseFenwickTree(object):
+    def __init__(self, size):
+        """
+        prefix sums over positions 0..size-1 with O(log n) point updates and queries, only the nodes covering
+        positions with a value are stored and a node is dropped when the last value under it is taken back out,
+        so the memory follows the values held rather than the size
+        """
+        self._size = size
+        self._tree = {} # node -> [sum, values under it]
+        self._total = 0
+        self._count = 0
+
+    def add(self, i, value) -> None:
+        self._update(i, value, 1)
+
+    def remove(self, i, value) -> None:
+        """
+        takes a value added at position i back out
+        """
+        self._update(i, -value, -1)
+
+    def _update(self, i, value, step) -> None:
+        self._total += value
+        self._count += step
+        tree, size = self._tree, self._size
+        i += 1
+        while i <= size:
+            node = tree.get(i)
+            if node is None:
+                tree[i] = [value, step]
+            elif node[1] + step == 0:
+                del tree[i]
+            else:
+                node[0] += value
+                node[1] += step
+            i += i & -i
+        if self._count == 0:
+            # no rounding left behind once the tree is empty
+            self._total = 0
+
+    def prefix_sum(self, i):
+        """
+        sum of the values at positions 0..i, 0 for i < 0
+        """
+        tree = self._tree
+        total = 0
+        i += 1
+        while i > 0:
+            node = tree.get(i)
+            if node is not None:
+                total += node[0]
+            i -= i & -i
+        return total
+
+    def total(self):
+        return self._total
+
+    def __len__(self):
+        return self._size
@@ -1,58 +1,154 @@
-from heapdict import heapdict
 import pandas as pd
 
+from events import TYPE_NAMES
+from event_history import empty_frame
+
+# heap positions of events that are not in the heap
+BUFFERED = -1 # added without a time yet, enters the heap with its first update
+DETACHED = -2 # removed or already occured
+
+
 class MinHeap:
-    def __init__(self):
-        self._events = heapdict()
-        self._buffer = set()
-        self._occured_events = heapdict()
+    def __init__(self, history=None):
+        """
+        binary heap keyed on (time, type, insertion sequence) tuples kept on the events,
+        every event stores its own position so updates and removals are O(log n),
+        events that occur are recorded in history (an EventHistory), without one they are
+        dropped once they occur (show_events(occured=True) is empty)
+        """
+        self._keys = []
+        self._events = []
+        self._seq = 0
+        self.history = history
         
     def update_event(self, event):
-        if (event not in self._events) and (event not in self._buffer):
+        pos = getattr(event, '_heap_index', DETACHED)
+        if pos == DETACHED:
             raise Exception('the event that you are trying to update does not exist')
-        self._events[event] = event
-        if event in self._buffer:
-            self._buffer.remove(event)
+        key = event.key = (event.time, event.type, event.key[2])
+        if pos == BUFFERED:
+            self._push(key, event)
+            return
+        old_key = self._keys[pos]
+        self._keys[pos] = key
+        if key < old_key:
+            self._sift_up(pos)
+        else:
+            self._sift_down(pos)
     
     def is_empty(self):
         return len(self._events) == 0
+
+    def get_imminent_time(self):
+        return self._keys[0][0]
     
     def get_imminent_event(self):
-        event, time = self._events.popitem()
-        self._occured_events[event] = event
+        keys, events = self._keys, self._events
+        event = events[0]
+        last_key, last_event = keys.pop(), events.pop()
+        if events:
+            keys[0], events[0] = last_key, last_event
+            self._sift_down(0)
+        # the key is not needed once the event left the heap for good
+        event._heap_index, event.key = DETACHED, None
+        if self.history is not None:
+            self.history.record(event)
         return event, event.time
     
     def remove(self, event):
-        if event not in self._events:
-            if event.type in ['start', 'finish']:
-                return
-            else:
+        pos = getattr(event, '_heap_index', DETACHED)
+        if pos < 0:
+            # job events wait outside of the heap until they get a time
+            if event.occurance_time_fixed:
                 raise Exception(event)
-        del self._events[event]
+            event._heap_index = DETACHED
+            return
+        self._remove_at(pos)
+        event._heap_index, event.key = DETACHED, None
         
+    def defer(self, event):
+        """
+        takes a scheduled event out of the heap, it enters again with its next update
+        """
+        pos = getattr(event, '_heap_index', DETACHED)
+        if pos < 0:
+            return
+        self._remove_at(pos)
+        event._heap_index = BUFFERED
+        
+    def _remove_at(self, pos):
+        keys, events = self._keys, self._events
+        last_key, last_event = keys.pop(), events.pop()
+        if pos < len(events):
+            old_key = keys[pos]
+            keys[pos], events[pos] = last_key, last_event
+            if last_key < old_key:
+                self._sift_up(pos)
+            else:
+                self._sift_down(pos)
         
     def add(self, event):
+        key = event.key = (event.time, event.type, self._seq)
+        self._seq += 1
         if event.time is None:
-            self._buffer.add(event)
+            event._heap_index = BUFFERED
         else:
-            self._events[event] = event
+            self._push(key, event)
+
+    def _push(self, key, event):
+        self._keys.append(key)
+        self._events.append(event)
+        self._sift_up(len(self._events) - 1)
+
+    def _sift_up(self, pos):
+        keys, events = self._keys, self._events
+        key, event = keys[pos], events[pos]
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            parent_key = keys[parent]
+            if not key < parent_key:
+                break
+            keys[pos] = parent_key
+            parent_event = events[parent]
+            events[pos] = parent_event
+            parent_event._heap_index = pos
+            pos = parent
+        keys[pos] = key
+        events[pos] = event
+        event._heap_index = pos
+
+    def _sift_down(self, pos):
+        keys, events = self._keys, self._events
+        size = len(keys)
+        key, event = keys[pos], events[pos]
+        child = 2*pos + 1
+        while child < size:
+            right = child + 1
+            if right < size and keys[right] < keys[child]:
+                child = right
+            child_key = keys[child]
+            if not child_key < key:
+                break
+            keys[pos] = child_key
+            child_event = events[child]
+            events[pos] = child_event
+            child_event._heap_index = pos
+            pos = child
+            child = 2*pos + 1
+        keys[pos] = key
+        events[pos] = event
+        event._heap_index = pos
         
     def show_events(self, occured=False):
         if occured:
-            heap = self._occured_events.heap
-        else:
-            heap = self._events.heap
-        event_times = [event_info[0].time for event_info in heap]
-        event_types = [event_info[1].type for event_info in heap]
-        event_order_ids = [event_info[1].order._id for event_info in heap]
+            if self.history is None:
+                return empty_frame()
+            return self.history.to_frame()
+        events = self._events
+        event_times = [event.time for event in events]
+        event_types = [TYPE_NAMES[event.type] for event in events]
+        event_order_ids = [event.order._id for event in events]
         
         events_df = pd.DataFrame({'time': event_times, 'type':event_types, 
                                   'order':event_order_ids})
-        if occured:
-            events_df['accepted'] = [event_info[1].order._due_date is not None for event_info in heap]
-        
         return events_df
-        
-    
-            
-    
\ No newline at end of file
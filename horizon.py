@@ -0,0 +1,85 @@
+from order import OrderTable, Order
+from scenario import Scenario
+
+# orders drawn at once when the horizon mode needs more of them
+BLOCK_SIZE = 4096
+
+
+class OrderStream(object):
+    def __init__(self, streams, dispatching_rule, env, horizon, block_size=BLOCK_SIZE):
+        """
+        orders of a time bounded run, drawn block by block and created one at a time,
+        only the next order is in the event heap so finished orders and their blocks can be freed
+        """
+        self._streams = streams
+        self._dispatching_rule = dispatching_rule
+        self._env = env
+        self.horizon = horizon
+        self._block_size = block_size
+        self._block = None
+        self._row = 0
+        self._last_arrival = 0
+        self.order_count = 0
+        self.exhausted = False
+
+    def _new_block(self) -> None:
+        scenario = Scenario(self._block_size, self._streams)
+        scenario.arrivals = scenario.arrivals + self._last_arrival
+        self._last_arrival = scenario.arrivals[-1]
+        self._block = OrderTable(scenario, dispatching_rule=self._dispatching_rule, env=self._env,
+                                 first_id=self.order_count)
+        self._row = 0
+
+    def schedule_next(self) -> None:
+        """
+        creates the next order (which adds its arrival event to the heap) unless it arrives after the horizon
+        """
+        if self.exhausted:
+            return
+        if self._block is None or self._row == self._block.n:
+            self._new_block()
+        if self._block.arrival.item(self._row) > self.horizon:
+            self.exhausted = True
+            self._block = None
+            return
+        Order(self._block, self._row)
+        self._row += 1
+        self.order_count += 1
+
+
+class StreamingStats(object):
+    def __init__(self, warmup_start, warmup_end):
+        """
+        the sums Environment.collect_stats computes over the order table, added up order by order
+        when an order leaves the system, orders count if any of their times is in the window
+        """
+        self.warmup_start = warmup_start
+        self.warmup_end = warmup_end
+        self.count, self.tardy, self.rejected = 0, 0, 0
+        self.weight, self.tardy_weight, self.rejected_weight = 0, 0, 0
+        self.tardy_amount = 0.0 # relative to the expected process times
+
+    def _in_window(self, t) -> bool:
+        return t is not None and self.warmup_start <= t <= self.warmup_end
+
+    def add(self, order) -> None:
+        start, finish = order._start_time, order._finish_time
+        # a cancelation after the start did not happen
+        cancelation = order._cancelation_time if start is None else None
+        if not any(self._in_window(t) for t in (order._arrival_time, start, cancelation, finish)):
+            return
+        weight, due_date = order._weight, order._due_date
+        self.count += 1
+        self.weight += weight
+        if due_date is None:
+            self.rejected += 1
+            self.rejected_weight += weight
+        elif finish is not None and finish > due_date:
+            self.tardy += 1
+            self.tardy_weight += weight
+            self.tardy_amount += (finish - due_date) / order._expected_process_time
+
+    def get_stats(self):
+        return (self.tardy / self.count, self.rejected / self.count, self.tardy_weight / self.weight,
+                self.rejected_weight / self.weight, self.tardy_amount / self.count,
+                self.tardy_amount / self.tardy_weight if self.tardy_weight else float('nan'))
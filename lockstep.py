@@ -0,0 +1,203 @@
+"""
+replications of a static dispatching rule run together as arrays with a replication axis,
+every step handles the next event of each replication, so the python overhead of an event
+is paid once per step instead of once per replication
+"""
+import numpy as np
+
+from order import OrderTable
+from rng import RandomStreams
+from scenario import Scenario
+from schedule import STATIC_RULES
+from utils.env_variables import CustomerParameters
+
+# due date policies the engine can quote, TWK depends on the orders finished so far one by one
+LOCKSTEP_POLICIES = ['CON', 'SLK']
+# queue slots per replication to start with, doubled when a queue outgrows them
+QUEUE_SLOTS = 16
+_EMPTY = np.iinfo(np.int64).max
+
+
+def check_config(config) -> None:
+    if config['dispatching_rule'] not in STATIC_RULES:
+        raise ValueError('the lockstep engine runs the static dispatching rules {}, not {}'.format(
+            STATIC_RULES, config['dispatching_rule']))
+    if config['due_date_policy_params']['policy'] not in LOCKSTEP_POLICIES:
+        raise ValueError('the lockstep engine quotes with {}, not {}'.format(
+            LOCKSTEP_POLICIES, config['due_date_policy_params']['policy']))
+    if config.get('simulation_time') is not None:
+        raise ValueError('the lockstep engine runs n orders per replication, simulation_time is not supported')
+    if config.get('machines', 1) != 1 or config.get('speeds') is not None:
+        raise ValueError('the lockstep engine runs a single machine')
+
+
+class LockstepBatch(object):
+    def __init__(self, seeds, n, due_date_policy_params, dispatching_rule, warmup):
+        """
+        the replications of seeds with the same events as Environment.run_once, the orders come
+        from the same Scenario so every replication matches its Environment run
+        """
+        self.R, self.n = len(seeds), n
+        self._policy = due_date_policy_params['policy']
+        self._constant = due_date_policy_params['constant']
+        self.warmup = warmup/2
+
+        tables = [OrderTable(Scenario(n, RandomStreams(seed)), dispatching_rule=dispatching_rule, env=None)
+                  for seed in seeds]
+        coefficients = np.array([CustomerParameters.get_params(i)[1] for i in range(len(CustomerParameters.get_probs()))])
+        self.arrival = np.stack([table.arrival for table in tables]).astype(np.float64)
+        self.expected_process_time = np.stack([table.expected_process_time for table in tables]).astype(np.float64)
+        self.process_time = np.stack([table.process_time for table in tables])
+        self.weight = np.stack([table.weight for table in tables])
+        self.rank = np.stack([table.rank for table in tables])
+        self.cancelation = np.nan_to_num(np.stack([table.cancelation for table in tables]), nan=np.inf)
+        self.rejection_draw = np.stack([table.rejection_draw for table in tables])
+        self.rejection_coefficient = coefficients[np.stack([table.customer for table in tables])]
+
+        # what happened to the orders, nan until known like in the OrderTable
+        self.due_date = np.full((self.R, n), np.nan)
+        self.start = np.full((self.R, n), np.nan)
+        self.finish = np.full((self.R, n), np.nan)
+        self.canceled = np.full((self.R, n), np.nan)
+
+        # next arrival and the job on the machine (-1 when idle)
+        self._next = np.zeros(self.R, dtype=np.int64)
+        self._job = np.full(self.R, -1, dtype=np.int64)
+        self._job_start = np.zeros(self.R)
+        self._job_expected = np.zeros(self.R)
+        self._job_finish = np.full(self.R, np.inf)
+
+        # queued orders per replication in unordered slots, the next job has the smallest rank
+        self._q_order = np.full((self.R, QUEUE_SLOTS), -1, dtype=np.int64)
+        self._q_rank = np.full((self.R, QUEUE_SLOTS), _EMPTY, dtype=np.int64)
+        self._q_expected = np.zeros((self.R, QUEUE_SLOTS))
+        self._q_cancelation = np.full((self.R, QUEUE_SLOTS), np.inf)
+
+    def run(self) -> list:
+        rows = np.arange(self.R)
+        last = self.n - 1
+        while True:
+            pending = self._next <= last
+            t_arrival = np.where(pending, self.arrival[rows, np.minimum(self._next, last)], np.inf)
+            t_cancelation = self._q_cancelation.min(axis=1)
+            t_finish = self._job_finish
+            # ties are broken as in the event heap: finish (with the next start) < arrival < cancelation
+            finishing = (t_finish <= t_arrival) & (t_finish <= t_cancelation) & (t_finish < np.inf)
+            arriving = ~finishing & pending & (t_arrival <= t_cancelation)
+            canceling = ~finishing & ~arriving & (t_cancelation < np.inf)
+            if not (finishing.any() or arriving.any() or canceling.any()):
+                break
+            if finishing.any():
+                self._finish(np.flatnonzero(finishing))
+            if arriving.any():
+                self._arrive(np.flatnonzero(arriving), t_arrival[arriving])
+            if canceling.any():
+                self._cancel(np.flatnonzero(canceling), t_cancelation[canceling])
+        return self.collect_stats()
+
+    def _start(self, rows, jobs, now) -> None:
+        self.start[rows, jobs] = now
+        self._job[rows] = jobs
+        self._job_start[rows] = now
+        self._job_expected[rows] = self.expected_process_time[rows, jobs]
+        self._job_finish[rows] = now + self.process_time[rows, jobs]
+
+    def _clear(self, rows, slots) -> None:
+        self._q_order[rows, slots] = -1
+        self._q_rank[rows, slots] = _EMPTY
+        self._q_expected[rows, slots] = 0
+        self._q_cancelation[rows, slots] = np.inf
+
+    def _finish(self, rows) -> None:
+        now = self._job_finish[rows]
+        self.finish[rows, self._job[rows]] = now
+        slots = self._q_rank[rows].argmin(axis=1)
+        jobs = self._q_order[rows, slots]
+        queued = jobs >= 0
+        self._start(rows[queued], jobs[queued], now[queued])
+        self._clear(rows[queued], slots[queued])
+        idle = rows[~queued]
+        self._job[idle] = -1
+        self._job_finish[idle] = np.inf
+
+    def _arrive(self, rows, now) -> None:
+        orders = self._next[rows]
+        self._next[rows] += 1
+        expected = self.expected_process_time[rows, orders]
+        idle = self._job[rows] < 0
+        remaining = np.where(idle, 0, np.maximum(0, self._job_start[rows] + self._job_expected[rows] - now))
+        t = now + remaining
+        if self._policy == 'CON':
+            due_dates = np.round(t + self._constant)
+        else:
+            # the queued orders processed before the new one, the queue is empty when the machine is idle
+            ahead = np.where(self._q_rank[rows] < self.rank[rows, orders][:, None], self._q_expected[rows], 0)
+            due_dates = np.round(ahead.sum(axis=1) + expected + t + self._constant)
+        rejects = self.rejection_draw[rows, orders] < \
+            1 - np.exp(-self.rejection_coefficient[rows, orders]*((due_dates - now)/expected))
+
+        accepted = ~rejects
+        self.due_date[rows[accepted], orders[accepted]] = due_dates[accepted]
+        starting = accepted & idle
+        self._start(rows[starting], orders[starting], now[starting])
+
+        queuing = accepted & ~idle
+        rows, orders = rows[queuing], orders[queuing]
+        if not len(rows):
+            return
+        free = self._q_order[rows] < 0
+        if not free.any(axis=1).all():
+            self._grow_queues()
+            free = self._q_order[rows] < 0
+        slots = free.argmax(axis=1)
+        self._q_order[rows, slots] = orders
+        self._q_rank[rows, slots] = self.rank[rows, orders]
+        self._q_expected[rows, slots] = self.expected_process_time[rows, orders]
+        self._q_cancelation[rows, slots] = self.cancelation[rows, orders]
+
+    def _cancel(self, rows, now) -> None:
+        # orders canceled at the same time go in the order they were created in
+        tied = self._q_cancelation[rows] == now[:, None]
+        slots = np.where(tied, self._q_order[rows], _EMPTY).argmin(axis=1)
+        self.canceled[rows, self._q_order[rows, slots]] = now
+        self._clear(rows, slots)
+
+    def _grow_queues(self) -> None:
+        slots = self._q_order.shape[1]
+        self._q_order = np.hstack([self._q_order, np.full((self.R, slots), -1, dtype=np.int64)])
+        self._q_rank = np.hstack([self._q_rank, np.full((self.R, slots), _EMPTY, dtype=np.int64)])
+        self._q_expected = np.hstack([self._q_expected, np.zeros((self.R, slots))])
+        self._q_cancelation = np.hstack([self._q_cancelation, np.full((self.R, slots), np.inf)])
+
+    def collect_stats(self) -> list:
+        """
+        the six metrics of Environment.collect_stats for every replication
+        """
+        max_time = np.nanmax(self.finish, axis=1)
+        warmup_start = np.trunc(max_time * (self.warmup / 100))[:, None]
+        warmup_end = np.trunc(max_time * ((100 - self.warmup) / 100))[:, None]
+
+        def between(times):
+            return (times >= warmup_start) & (times <= warmup_end)
+
+        warmed = between(self.arrival) | between(self.start) | between(self.canceled) | between(self.finish)
+        tardy = warmed & (self.finish > self.due_date)
+        rejected = warmed & np.isnan(self.due_date)
+        relative = np.where(tardy, (self.finish - self.due_date) / self.expected_process_time, 0)
+        # summed over the warmed up orders of each replication like collect_stats, the rounding is the same
+        tardy_amount = np.array([relative[r][warmed[r]].sum() for r in range(self.R)])
+        count = warmed.sum(axis=1)
+        weight = np.where(warmed, self.weight, 0).sum(axis=1)
+        tardy_weight = np.where(tardy, self.weight, 0).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats = (tardy.sum(axis=1) / count, rejected.sum(axis=1) / count, tardy_weight / weight,
+                     np.where(rejected, self.weight, 0).sum(axis=1) / weight, tardy_amount / count,
+                     tardy_amount / tardy_weight)
+        return [tuple(float(stat[r]) for stat in stats) for r in range(self.R)]
+
+
+def run_batch(args) -> list:
+    config, seeds = args
+    batch = LockstepBatch(seeds, config['n'], config['due_date_policy_params'], config['dispatching_rule'],
+                          config['warmup'])
+    return batch.run()
@@ -0,0 +1,156 @@
+"""
+the machines of a parallel machine shop, identical or uniform (a job takes process time / speed),
+a machine is picked in O(log m) from heaps: the idle machines fastest first, the busy ones by the time
+their job finishes and, for routing orders to the queues of the machines, by the time they are expected
+to be free of their queued work
+"""
+import heapq
+
+# orders wait in one queue the machines take their next job from, or each machine has its own queue
+QUEUE_MODES = ['shared', 'machine']
+
+
+class MachineSet(object):
+    def __init__(self, speeds):
+        """
+        heap entries of a machine that changed are left behind and dropped once they come up
+        """
+        self.speeds = list(speeds)
+        self.count = len(self.speeds)
+        self.identical = len(set(self.speeds)) == 1
+        self.jobs = [None] * self.count # job on each machine, None when idle
+        self.starts = [0.0] * self.count
+        self.finishes = [0.0] * self.count # of the job on the machine, or of the last one when idle
+        self.workloads = [0.0] * self.count # expected time the orders queued for the machine take on it
+        self._idle = [(-speed, k) for k, speed in enumerate(self.speeds)]
+        heapq.heapify(self._idle)
+        self._in_idle = [True] * self.count # machines with an entry in the idle heap, at most one each
+        self._busy = [] # (finish, machine)
+        self._free = [] # (expected free time, version, machine)
+        self._versions = [0] * self.count
+        for k in range(self.count):
+            self._push_free(k)
+
+    def start(self, k, job, now, finish) -> None:
+        self.jobs[k] = job
+        self.starts[k] = now
+        self.finishes[k] = finish
+        heapq.heappush(self._busy, (finish, k))
+        self._push_free(k)
+
+    def finish(self, k) -> None:
+        self.jobs[k] = None
+        if not self._in_idle[k]:
+            heapq.heappush(self._idle, (-self.speeds[k], k))
+            self._in_idle[k] = True
+        self._push_free(k)
+
+    def add_work(self, k, work) -> None:
+        self.workloads[k] += work
+        self._push_free(k)
+
+    def fastest_idle(self):
+        """
+        the fastest idle machine, None when all are busy
+        """
+        idle = self._idle
+        while idle:
+            k = idle[0][1]
+            if self.jobs[k] is None:
+                return k
+            heapq.heappop(idle)
+            self._in_idle[k] = False
+        return None
+
+    def earliest_finish(self):
+        """
+        (finish time, machine) of the busy machine that finishes first, None when all are idle
+        """
+        busy = self._busy
+        while busy:
+            finish, k = busy[0]
+            if self.jobs[k] is not None and self.finishes[k] == finish:
+                return finish, k
+            heapq.heappop(busy)
+        return None
+
+    def remaining(self, k, now):
+        """
+        expected time until the job on machine k is done, 0 when it is idle or late
+        """
+        job = self.jobs[k]
+        if job is None:
+            return 0
+        return max(0, self.starts[k] + job._expected_process_time / self.speeds[k] - now)
+
+    def _free_time(self, k):
+        # expected end of the job on the machine (the last one when idle) and of its queued work
+        job = self.jobs[k]
+        end = self.finishes[k] if job is None else self.starts[k] + job._expected_process_time / self.speeds[k]
+        return end + self.workloads[k]
+
+    def _push_free(self, k) -> None:
+        self._versions[k] += 1
+        heapq.heappush(self._free, (self._free_time(k), self._versions[k], k))
+        if len(self._free) > 4 * self.count:
+            self._free = [(self._free_time(k), self._versions[k], k) for k in range(self.count)]
+            heapq.heapify(self._free)
+
+    def route(self, now, expected_process_time):
+        """
+        machine expected to complete a new order first when it is queued behind the work of the machine,
+        the top of the heap for identical machines, uniform ones are compared one by one
+        """
+        if not self.identical:
+            return min(range(self.count), key=lambda k: max(now, self._free_time(k))
+                       + expected_process_time / self.speeds[k])
+        return self._first_free()[1]
+
+    def _first_free(self):
+        # (free time, machine) at the top of the free time heap, entries left behind are dropped
+        free = self._free
+        while free[0][1] != self._versions[free[0][2]]:
+            heapq.heappop(free)
+        return free[0][0], free[0][2]
+
+    def _free_in_order(self):
+        """
+        (free time, machine) of every machine, the one expected to be free first first, walking the heap without
+        popping it so that reading the k first machines takes O(k log k)
+        """
+        free, versions = self._free, self._versions
+        frontier = [(free[0], 0)]
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            if entry[1] == versions[entry[2]]:
+                yield entry[0], entry[2]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(free):
+                    heapq.heappush(frontier, (free[child], child))
+
+    def first_remaining(self, now):
+        """
+        expected time from now until the first machine is free, with a shared queue (no work added to the machines)
+        the free time of a machine is the expected end of its job
+        """
+        return max(0, self._first_free()[0] - now)
+
+    def expected_start(self, now, work):
+        """
+        (remaining, start) from now until the first machine is free and until the machines have processed
+        work more of the queued work, as if the work was shared by the machines as they become free,
+        for a shared queue (see first_remaining), only the machines free before the start are read
+        """
+        first, start = None, 0
+        speed, weighted = 0, 0
+        for t, k in self._free_in_order():
+            r = max(0, t - now)
+            if first is None:
+                first = r
+            elif start <= r:
+                break
+            # all machines free by then work at the combined speed
+            speed += self.speeds[k]
+            weighted += self.speeds[k] * r
+            start = (work + weighted) / speed
+        return first, start
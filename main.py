@@ -3,9 +3,11 @@ import pandas as pd
 import datetime
 import _pickle
 
-from simulation_environment import Simulation
+from sweep import Sweep
+from result_store import ResultStore
 from utils.model_params import *
-from utils.helpers import pareto_optimum, plot_frontier
+from simulation_environment import STAT_NAMES
+from utils.helpers import FRONTIERS, pareto_optimum, plot_frontier
 
 
 if __name__ == '__main__':
@@ -15,25 +17,53 @@ if __name__ == '__main__':
 
     seed, n, simulation_time, warmup, n_sim = get_simulation_params()
     records['seed'], records['n'], records['simulation_time'], records['warmup'], records['n_sim'] = seed, n, simulation_time, warmup, n_sim
+    targets, min_sim, max_sim, confidence = get_stopping_params()
+    records['targets'], records['min_sim'], records['max_sim'], records['confidence'] = targets, min_sim, max_sim, confidence
 
     records['results'] = None
 
-    simulation_info = []
+    points = []
     for dispatching_rule in dispatching_rule_grid():
             for due_date_policy_params in due_date_policy_grid():
-                print(dispatching_rule, due_date_policy_params)
-                sim = Simulation(seed=seed, n=n, due_date_policy_params=due_date_policy_params, dispatching_rule=dispatching_rule, warmup=warmup)
-                stats = sim.run(n_sim = n_sim)
-                sim_info = {'dispatching':dispatching_rule, 'due_date':due_date_policy_params['policy'],
-                        'due_date_param':list(due_date_policy_params.values())[1]}
-                sim_info.update(stats)
-                simulation_info.append(sim_info)
-                #print(stats)
-                #print()
+                points.append({'n':n, 'due_date_policy_params':due_date_policy_params, 'dispatching_rule':dispatching_rule, 'warmup':warmup})
+                if simulation_time is not None:
+                    # orders arrive until simulation_time, n is only used to estimate the cost of a replication
+                    points[-1]['simulation_time'] = simulation_time
+
+    # every replication of every point goes through one pool, slowest first
+    # finished replications are kept in results.sqlite, a rerun only runs the missing ones
+    store = ResultStore('results.sqlite')
+    sweep = Sweep(seed=seed, points=points, cost_file='sweep_costs.json', store=store)
+    racing, racing_min_sim, eta, refine = get_racing_params()
+    records['racing'] = racing
+    callback = lambda point, stats: print(point['dispatching_rule'], point['due_date_policy_params'])
+    if racing:
+        # dominated points are dropped early and the refined points are added to the grid
+        records['racing_min_sim'], records['eta'], records['refine'] = racing_min_sim, eta, refine
+        points, summaries = sweep.race(min_sim=racing_min_sim, max_sim=max_sim, eta=eta, refine=refine,
+                                       confidence=confidence, callback=callback)
+    else:
+        summaries = sweep.run(n_sim=n_sim, targets=targets, min_sim=min_sim, max_sim=max_sim, confidence=confidence,
+                              callback=callback)
+
+    simulation_info = []
+    for point, stats in zip(points, summaries):
+        due_date_policy_params = point['due_date_policy_params']
+        sim_info = {'dispatching':point['dispatching_rule'], 'due_date':due_date_policy_params['policy'],
+                'due_date_param':list(due_date_policy_params.values())[1]}
+        sim_info.update(stats)
+        simulation_info.append(sim_info)
 
     df = pd.DataFrame(simulation_info)
-    optimum = df.apply(pareto_optimum, axis=1, df=df)
-    df[['pareto_opt1', 'pareto_opt_weighted1', 'pareto_opt2', 'pareto_opt_weighted2']] = optimum.apply(pd.Series)
+    # frontiers of the means over the replications
+    means = df[STAT_NAMES].map(lambda stat: stat['mean'])
+    if racing:
+        # the dropped points ran fewer replications, the frontiers are the ones of the points left
+        left = ~df['eliminated'].astype(bool)
+        df[list(FRONTIERS)] = False
+        df.loc[left, list(FRONTIERS)] = pareto_optimum(means[left])
+    else:
+        df[list(FRONTIERS)] = pareto_optimum(means)
     plot_frontier(df, type='t_v_r')
 
     records['results'] = df
@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 
 from product import Product
@@ -6,45 +5,181 @@ from customer import Customer
 
 from events import JobStart, JobFinish, OrderCancelation, OrderArrival
 
-from utils.helpers import Rounder
+
+# the scenario arrays as the table keeps them, a scenario that already has these dtypes is used without a copy
+SCENARIO_DTYPES = {'arrivals': np.int64, 'product_types': np.int8, 'customer_types': np.int8, 'quantities': np.int32,
+                   'process_times': np.float64, 'expected_process_times': np.int64, 'weights': np.int64,
+                   'cancelation_offsets': np.int64, 'rejection_draws': np.float64}
+
+
+class OrderTable(object):
+    def __init__(self, scenario, dispatching_rule, env, first_id=0):
+        """
+        struct-of-arrays store for every order of a replication (or a block of them, ids from first_id on),
+        times that are not known (yet) are kept as nan
+        """
+        self.environment = env
+        self.dispatching_rule = dispatching_rule
+        self.n = scenario.n
+
+        self.id = np.arange(first_id, first_id + self.n)
+        self.arrival = self._column(scenario, 'arrivals')
+        self.product = self._column(scenario, 'product_types')
+        self.customer = self._column(scenario, 'customer_types')
+        self.quantity = self._column(scenario, 'quantities')
+        self.process_time = self._column(scenario, 'process_times')
+        self.expected_process_time = self._column(scenario, 'expected_process_times')
+        self.weight = self._column(scenario, 'weights')
+        self.due_date = np.full(self.n, np.nan)
+        self.start = np.full(self.n, np.nan)
+        self.finish = np.full(self.n, np.nan)
+        self.cancelation = np.where(scenario.cancelation_offsets < 0, np.nan, scenario.arrivals + scenario.cancelation_offsets)
+        self.rejection_draw = self._column(scenario, 'rejection_draws')
+        # machine an order is processed on (or planned on) when there are several, -1 before that
+        self.machine = np.full(self.n, -1, dtype=np.int16)
+        self.priority = self._get_priorities()
+        self.rank = self._get_ranks()
+
+        # products and customers only differ by type, one shared instance per type
+        self.products = [Product(i) for i in range(len(scenario._product_probs))]
+        self.customers = [Customer(i) for i in range(len(scenario._customer_probs))]
+
+    @staticmethod
+    def _column(scenario, name) -> np.ndarray:
+        return getattr(scenario, name).astype(SCENARIO_DTYPES[name], copy=False)
+
+    def _get_priorities(self):
+        """
+        precomputed sort keys of the static dispatching rules,
+        the order with the smallest key is processed first
+        """
+        if self.dispatching_rule == 'FIFO':
+            return self.arrival
+        if self.dispatching_rule == 'SPT':
+            return self.expected_process_time
+        if self.dispatching_rule == 'BWF':
+            return -self.weight
+        return None
+
+    def _get_ranks(self):
+        """
+        position of every order in the static rule's processing order over all orders,
+        ties are processed last-in-first-out like in the queue
+        """
+        if self.priority is None:
+            return None
+        rank = np.empty(self.n, dtype=np.int64)
+        rank[np.lexsort((-self.id, self.priority))] = np.arange(self.n)
+        return rank
+
+    def create_orders(self) -> dict:
+        return {i: Order(self, i) for i in range(self.n)}
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in vars(self).values() if isinstance(column, np.ndarray))
+
+
+def _nan_to_none(value):
+    return None if value != value else value
+
 
 class Order(object):
-    def __init__(self, arrival_time, product_type, customer_type, quantity, dispatching_rule, env, order_id):
-        self._environment = env
-        self._id = order_id
-        
-        self._arrival_time = np.round(arrival_time).astype(int)
+    """
+    lightweight view on one row of an OrderTable
+    """
+    __slots__ = ('_table', '_row', '_event_arrival', '_event_cancelation', '_event_job_start', '_event_job_finish')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
         self._event_arrival = OrderArrival(self._arrival_time, self)
-        self._quantity = np.round(quantity).astype(int)
-        self._product = Product(product_type)
-        self._customer = Customer(customer_type)
-        
-        self._start_time = None
-        self._finish_time = None
-        
-        #unit process time is calculated with (expected p.t. * k)
-        self._process_time = max(1, self._product.get_unit_process_time() * quantity)
-        
-        self._expected_process_time = Rounder.round(self._product.get_expected_unit_process_time() * quantity)
-        self._weight = np.round(quantity * self._product.get_unit_profit() * self._customer.get_reliability() * max(1, self._customer.get_weight_coefficient())).astype(int)
-        
-        self._dispatching_rule = dispatching_rule
-        
-        cancels_after = self._customer.cancels_order()
-        if cancels_after is None:
-            self._cancelation_time = None
-        else:
-            #if  self._start_time is not None and self._start_time > (self._arrival_time + cancels_after):
-            self._cancelation_time = self._arrival_time + cancels_after
+        if self._cancelation_time is not None:
             self._event_cancelation = OrderCancelation(self._cancelation_time, self)
-#             else:
-#                 self._cancelation_time = None
-#             # to detect the cancels_after time
-#             if self._id in [547,661,671,700]:
-#                 print(cancels_after,' ', self._id, ' ',self._cancelation_time )
+
+    @property
+    def _environment(self):
+        return self._table.environment
+
+    @property
+    def _id(self):
+        return self._table.id.item(self._row)
+
+    @property
+    def _arrival_time(self):
+        return self._table.arrival.item(self._row)
+
+    @property
+    def _quantity(self):
+        return self._table.quantity.item(self._row)
+
+    @property
+    def _product(self):
+        return self._table.products[self._table.product.item(self._row)]
+
+    @property
+    def _customer(self):
+        return self._table.customers[self._table.customer.item(self._row)]
+
+    @property
+    def _process_time(self):
+        return self._table.process_time.item(self._row)
+
+    @property
+    def _expected_process_time(self):
+        return self._table.expected_process_time.item(self._row)
+
+    @property
+    def _weight(self):
+        return self._table.weight.item(self._row)
+
+    @property
+    def _dispatching_rule(self):
+        return self._table.dispatching_rule
+
+    @property
+    def _due_date(self):
+        return _nan_to_none(self._table.due_date.item(self._row))
+
+    @_due_date.setter
+    def _due_date(self, due_date):
+        self._table.due_date[self._row] = np.nan if due_date is None else due_date
+
+    @property
+    def _machine(self):
+        return self._table.machine.item(self._row)
+
+    @_machine.setter
+    def _machine(self, machine):
+        self._table.machine[self._row] = machine
+
+    @property
+    def _start_time(self):
+        return _nan_to_none(self._table.start.item(self._row))
+
+    @_start_time.setter
+    def _start_time(self, t):
+        self._table.start[self._row] = t
+
+    @property
+    def _finish_time(self):
+        return _nan_to_none(self._table.finish.item(self._row))
+
+    @_finish_time.setter
+    def _finish_time(self, t):
+        self._table.finish[self._row] = t
+
+    @property
+    def _cancelation_time(self):
+        return _nan_to_none(self._table.cancelation.item(self._row))
+
+    @_cancelation_time.setter
+    def _cancelation_time(self, t):
+        self._table.cancelation[self._row] = np.nan if t is None else t
             
     def due_date_accepted(self, due_date, t) -> bool:
-        if self._customer.rejects_due_date((due_date - t)/self._expected_process_time):
+        draw = self._table.rejection_draw.item(self._row)
+        if self._customer.rejects_due_date((due_date - t)/self._expected_process_time, draw):
             #print('due date rejected', self._id)
             self._due_date = None
             self.prevent_cancelation()
@@ -56,19 +191,16 @@ class Order(object):
             self._event_job_finish = JobFinish(None, self)
             return True
         
-    def update_event_times(self, t) -> float:
+    def update_event_times(self, t, speed=1) -> float:
+        process_time = self._process_time / speed
         self._event_job_start.update_time(t)
-        self._event_job_finish.update_time(t + self._process_time)
+        self._event_job_finish.update_time(t + process_time)
         #print('here update_event_times', t, t + self._process_time)
-        return t + self._process_time
+        return t + process_time
     
-#     def get_stats(self):
-#         # order's ---> id + customer + product + quantity + weight + arrival
-#                     # + dd offered + dd accepted + start + cancelled + finish +
-#         stats_list = [self._id, self._customer._type, self._product._type, self._quantity, self.get_weight(), 
-#                       self._arrival_time, self.due_date_accepted(), self._start_time, self._cancelation_time, 
-#                       self._finish_time]
-#         return [stats_list]
+    def defer_events(self) -> None:
+        self._event_job_start.defer()
+        self._event_job_finish.defer()
     
     def get_expected_process_time(self):
         return self._expected_process_time
@@ -80,23 +212,28 @@ class Order(object):
         self._event_job_start.remove()
         self._event_job_finish.remove()
         
+    def release_events(self) -> None:
+        """
+        drops the events of an order that left the system, they refer back to the order
+        and would keep it and its table alive until the garbage collector finds the cycle
+        """
+        for name in ('_event_arrival', '_event_cancelation', '_event_job_start', '_event_job_finish'):
+            if hasattr(self, name):
+                delattr(self, name)
+
     def prevent_cancelation(self) -> None:
         if self._cancelation_time is not None:
             self._cancelation_time = None
             self._event_cancelation.remove()
             
     def __lt__(self, other_order):
-        if self._dispatching_rule == 'FIFO':
+        dispatching_rule = self._table.dispatching_rule
+        if dispatching_rule == 'FIFO':
              return self._arrival_time < other_order._arrival_time
-        if self._dispatching_rule == 'SPT':
+        if dispatching_rule == 'SPT':
              return self._expected_process_time < other_order._expected_process_time
-        if self._dispatching_rule == 'BWF':
+        if dispatching_rule == 'BWF':
              return -self._weight < -other_order._weight
             
     def __repr__(self):
         return f'{self._id}'
-        info = {'arrival': self._arrival_time, 'exp_process_time': self._expected_process_time, 'weight': self._weight[0]}
-        stringified = ""
-        for k, v in info.items():
-            stringified += f"{k}: {v}\n"
-        return f"({stringified})"
@@ -1,5 +1,4 @@
 from utils.env_variables import ProductParameters
-from utils.helpers import Rounder
 
 class Product(object):
     def __init__(self, prod_type):
@@ -12,9 +11,6 @@ class Product(object):
     def get_type(self):
         return self._type
 
-    def get_unit_process_time(self) -> float:
-        return Rounder.round(self.get_expected_unit_process_time() * ProductParameters.get_uncertainty_multiplier())
-        
     def get_expected_unit_process_time(self) -> float:
         loc, scale = self._unit_process_time
         return loc + scale/2
@@ -0,0 +1,112 @@
+from time import perf_counter_ns
+
+import pandas as pd
+
+# methods of the environment, its event heap and its queue that are timed, by the name they are reported under
+ENVIRONMENT_METHODS = {'arrival': 'arrival', 'cancelation': 'cancelation', 'start_job': 'start',
+                       'finish_job': 'finish', '_update_events': 'update_events', 'collect_stats': 'collect_stats'}
+HEAP_METHODS = {'add': 'heap.add', 'update_event': 'heap.update', 'get_imminent_event': 'heap.pop',
+                'remove': 'heap.remove', 'defer': 'heap.defer'}
+QUEUE_METHODS = {'optimize': 'optimize'}
+
+
+class Profile(object):
+    def __init__(self):
+        """
+        call counts and cumulative perf_counter_ns times of the hot methods of a replication,
+        the queue lengths reschedule was called with and the time the solver spent in optimize,
+        times include the calls made from within (an arrival includes its reschedule)
+        """
+        self.counts = {}
+        self.times = {}
+        self.queue_lengths = {} # queue length: reschedule calls
+        self.solver_ns = 0 # time the solver reported for solving, the rest of a solve call built the model
+
+    def _timed(self, name, function):
+        counts, times = self.counts, self.times
+        counts.setdefault(name, 0)
+        times.setdefault(name, 0)
+
+        def timed(*args, **kwargs):
+            t = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[name] += perf_counter_ns() - t
+                counts[name] += 1
+        return timed
+
+    def _timed_reschedule(self, queue):
+        timed = self._timed('reschedule', queue.reschedule)
+        queue_lengths = self.queue_lengths
+
+        def reschedule(*args, **kwargs):
+            length = len(queue._sequence) if queue._incremental else len(queue._orders_unordered)
+            queue_lengths[length] = queue_lengths.get(length, 0) + 1
+            return timed(*args, **kwargs)
+        return reschedule
+
+    def _timed_solve(self, solver):
+        timed = self._timed('solve', solver.solve)
+
+        def solve(*args, **kwargs):
+            c = timed(*args, **kwargs)
+            runtime = getattr(solver, 'runtime', None)
+            if runtime is not None:
+                self.solver_ns += int(runtime * 1e9)
+            return c
+        return solve
+
+    def instrument(self, env) -> None:
+        """
+        replaces the methods on the instances of env with timed ones, the classes are not touched
+        so an environment without a profile runs the plain methods
+        """
+        instrumented = [(env, ENVIRONMENT_METHODS), (env.event_heap, HEAP_METHODS)]
+        # with several machines every machine can have its own queue
+        for queue in env._queues:
+            if queue._policy == 'optimization':
+                instrumented.append((queue, QUEUE_METHODS))
+        for objects, methods in instrumented:
+            for method, name in methods.items():
+                # wrap once, _initialize can run again on the same environment
+                if method not in vars(objects):
+                    setattr(objects, method, self._timed(name, getattr(objects, method)))
+        for queue in env._queues:
+            if 'reschedule' not in vars(queue):
+                queue.reschedule = self._timed_reschedule(queue)
+            solver = queue._solver
+            if solver is not None and 'solve' not in vars(solver):
+                solver.solve = self._timed_solve(solver)
+
+    def merge(self, other) -> None:
+        for name, count in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + count
+            self.times[name] = self.times.get(name, 0) + other.times[name]
+        for length, count in other.queue_lengths.items():
+            self.queue_lengths[length] = self.queue_lengths.get(length, 0) + count
+        self.solver_ns += other.solver_ns
+
+    @staticmethod
+    def merged(profiles):
+        profile = Profile()
+        for other in profiles:
+            profile.merge(other)
+        return profile
+
+    def to_dict(self) -> dict:
+        times = dict(self.times)
+        if 'optimize' in times:
+            # preparing the solver input in the queue, building the model in the solver is solve.model
+            times['optimize.build'] = times['optimize'] - times.get('solve', 0)
+        if self.solver_ns:
+            times['solve.model'] = times['solve'] - self.solver_ns
+            times['solve.optimize'] = self.solver_ns
+        return {'counts': dict(self.counts), 'times_ns': times,
+                'queue_lengths': dict(sorted(self.queue_lengths.items()))}
+
+    def show(self) -> pd.DataFrame:
+        profile = self.to_dict()
+        df = pd.DataFrame({'count': pd.Series(profile['counts']), 'total [ms]': pd.Series(profile['times_ns']) / 1e6})
+        df['mean [us]'] = 1e3 * df['total [ms]'] / df['count']
+        return df.sort_values('total [ms]', ascending=False)
@@ -0,0 +1,93 @@
+"""
+the elimination and refinement steps of Sweep.race, a point holds the results of its replications
+by replication index, and replication i of every point runs the orders of the same seed
+"""
+import numpy as np
+from scipy.stats import t as student_t
+
+from simulation_environment import STAT_NAMES
+from utils.pareto import pareto_front
+
+# the parameter of each due date policy that is bisected, and the smallest step still taken
+CONTINUOUS_PARAMS = {'CON': 'constant', 'SLK': 'constant', 'TWK': 'moving_avg_window', 'QNT': 'quantile'}
+RESOLUTIONS = {'constant': 5, 'moving_avg_window': 10, 'quantile': 0.025}
+INTEGER_PARAMS = ['moving_avg_window']
+
+
+def dominates(a, b, objectives, confidence) -> bool:
+    """
+    whether point a is better than point b with confidence, on the replications both have run
+    (paired, so the differences do not carry the variance of the orders): the confidence interval
+    of the mean difference a - b is at most zero for every objective and below zero for one,
+    the confidence is split over the objectives
+    """
+    common = [i for i in a.results if i in b.results]
+    if len(common) < 2:
+        return False
+    confidence = 1 - (1 - confidence) / len(objectives)
+    quantile = student_t.ppf((1 + confidence) / 2, len(common) - 1)
+    better = False
+    for name in objectives:
+        k = STAT_NAMES.index(name)
+        difference = np.array([a.results[i][k] - b.results[i][k] for i in common])
+        upper = difference.mean() + quantile * difference.std(ddof=1) / np.sqrt(len(common))
+        # nan metrics are never decided on
+        if not upper <= 0:
+            return False
+        better |= upper < 0
+    return better
+
+
+def dominated(points, alive, objectives, confidence) -> set:
+    """
+    the alive points another alive point dominates with confidence
+    """
+    return {k for k in alive if any(dominates(points[j], points[k], objectives, confidence) for j in alive if j != k)}
+
+
+def _family(kwargs, name):
+    # points that only differ in the bisected parameter
+    params = kwargs['due_date_policy_params']
+    return (tuple(sorted((key, value) for key, value in kwargs.items() if key != 'due_date_policy_params')),
+            tuple(sorted((key, value) for key, value in params.items() if key != name)))
+
+
+def refine(points, alive, objectives) -> list:
+    """
+    kwargs of the new points halfway between a point on the frontier of the alive points (by the mean
+    of the objectives) and its neighbours with the same dispatching rule and due date policy,
+    the parameter range of the grid is not extended and steps below the resolution are not taken
+    """
+    means = np.array([[np.mean([result[STAT_NAMES.index(name)] for result in points[k].results.values()])
+                       for name in objectives] for k in alive])
+    valid = ~np.isnan(means).any(axis=1)
+    front = np.zeros(len(alive), dtype=bool)
+    front[valid] = pareto_front(means[valid])
+
+    values = {}
+    for point in points:
+        name = CONTINUOUS_PARAMS.get(point.kwargs['due_date_policy_params']['policy'])
+        if name is not None:
+            family = _family(point.kwargs, name)
+            values.setdefault(family, set()).add(point.kwargs['due_date_policy_params'][name])
+
+    new = []
+    for k in np.asarray(alive)[front]:
+        kwargs = points[k].kwargs
+        params = kwargs['due_date_policy_params']
+        name = CONTINUOUS_PARAMS.get(params['policy'])
+        if name is None:
+            continue
+        family = values[_family(kwargs, name)]
+        value = params[name]
+        below = [other for other in family if other < value]
+        above = [other for other in family if other > value]
+        for neighbour in ([max(below)] if below else []) + ([min(above)] if above else []):
+            middle = (value + neighbour) / 2
+            if name in INTEGER_PARAMS:
+                middle = int(round(middle))
+            if abs(middle - value) < RESOLUTIONS[name] or middle in family:
+                continue
+            family.add(middle)
+            new.append(dict(kwargs, due_date_policy_params=dict(params, **{name: middle})))
+    return new
@@ -0,0 +1,145 @@
+"""
+results of single replications on disk, keyed on a hash of the configuration, the seed and the code,
+so an interrupted or extended sweep only runs the replications that are missing
+
+usage: python -m result_store [path]   reports the coverage of the grid in utils/model_params.py
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import inspect
+import sqlite3
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# modules the result of a replication depends on and the model parameters, the tooling around the model
+# (sweeps, racing, profiling, traces, event histories, lockstep runs) and the grids and analysis in utils are left
+# out so that editing them keeps the stored results
+MODEL_MODULES = ['customer', 'due_date_policies', 'events', 'fenwick', 'heap', 'horizon', 'machines', 'order',
+                 'product', 'rng', 'scenario', 'schedule', 'shared_scenario', 'simulation_environment',
+                 'solver_cache', 'solvers', os.path.join('utils', 'env_variables')]
+
+
+def get_code_version() -> str:
+    """
+    hash of the model sources and parameters, a change in any of them invalidates the stored results
+    """
+    from utils.helpers import Rounder
+
+    digest = hashlib.sha1()
+    for module in sorted(MODEL_MODULES):
+        path = os.path.join(ROOT, module + '.py')
+        digest.update(os.path.relpath(path, ROOT).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    # the rounding of the model lives among the analysis helpers
+    digest.update(inspect.getsource(Rounder).encode())
+    return digest.hexdigest()[:16]
+
+
+def _to_json(value):
+    if isinstance(value, np.random.SeedSequence):
+        return {'entropy': value.entropy, 'spawn_key': list(value.spawn_key)}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('cannot store {} in a result key'.format(type(value)))
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, default=_to_json)
+
+
+def get_point_key(config) -> str:
+    point = {key: value for key, value in config.items() if key != 'seed'}
+    return hashlib.sha1(_canonical(point).encode()).hexdigest()
+
+
+class ResultStore(object):
+    def __init__(self, path, version=None):
+        """
+        sqlite table of replication results, written one row per finished replication
+        """
+        self.path = path
+        self.version = get_code_version() if version is None else version
+        self._connection = sqlite3.connect(path)
+        # wal keeps the file consistent when the sweep is killed in the middle of a write
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, point TEXT, '
+                                 'config TEXT, seed TEXT, version TEXT, stats TEXT, elapsed REAL, created REAL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_point ON results (point, version)')
+        self._connection.commit()
+        self.hits, self.misses = 0, 0
+
+    def _key(self, config) -> str:
+        return hashlib.sha1((_canonical(config) + self.version).encode()).hexdigest()
+
+    def get(self, config):
+        """
+        stats of the replication or None, config includes the seed
+        """
+        row = self._connection.execute('SELECT stats FROM results WHERE key = ?', (self._key(config),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, config, stats, elapsed=None) -> None:
+        point = {key: value for key, value in config.items() if key != 'seed'}
+        self._connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 (self._key(config), get_point_key(config), _canonical(point),
+                                  _canonical(config['seed']), self.version, _canonical([float(x) for x in stats]),
+                                  elapsed, time.time()))
+        self._connection.commit()
+
+    def count(self, config) -> int:
+        """
+        number of stored replications of the configuration (without seed) for the current code
+        """
+        row = self._connection.execute('SELECT COUNT(*) FROM results WHERE point = ? AND version = ?',
+                                       (get_point_key(config), self.version)).fetchone()
+        return row[0]
+
+    def get_stats(self) -> dict:
+        total, current = self._connection.execute(
+            'SELECT COUNT(*), SUM(version = ?) FROM results', (self.version,)).fetchone()
+        return {'entries': total, 'current': current or 0, 'stale': total - (current or 0),
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def report_coverage(path) -> None:
+    from utils.model_params import get_simulation_params, get_stopping_params, dispatching_rule_grid, due_date_policy_grid
+
+    store = ResultStore(path)
+    seed, n, simulation_time, warmup, n_sim = get_simulation_params()
+    targets, min_sim, max_sim, confidence = get_stopping_params()
+    wanted = n_sim if targets is None else min_sim
+    complete, points, stored = 0, 0, 0
+    print('code version {}, {} replications per point{}'.format(
+        store.version, wanted, '' if targets is None else ' at least (up to {})'.format(max_sim)))
+    for dispatching_rule in dispatching_rule_grid():
+        for due_date_policy_params in due_date_policy_grid():
+            config = {'n': n, 'due_date_policy_params': due_date_policy_params,
+                      'dispatching_rule': dispatching_rule, 'warmup': warmup}
+            if simulation_time is not None:
+                # as main.py builds the points of a time bounded sweep
+                config['simulation_time'] = simulation_time
+            count = store.count(config)
+            points += 1
+            stored += count
+            complete += count >= wanted
+            print('{:>14} {:>40} {:>5}'.format(dispatching_rule, _canonical(due_date_policy_params), count))
+    stats = store.get_stats()
+    print('{} of {} points complete, {} replications stored for this code version, {} stale'.format(
+        complete, points, stored, stats['stale']))
+
+
+if __name__ == '__main__':
+    report_coverage(sys.argv[1] if len(sys.argv) > 1 else 'results.sqlite')
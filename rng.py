@@ -0,0 +1,30 @@
+import numpy as np
+
+# one independent stream per source of randomness, so that drawing more or less of one kind
+# never shifts the draws of another, new streams go to the end to keep the existing ones
+STREAMS = ('arrivals', 'products', 'customers', 'quantities', 'process_times', 'weights', 'cancelations', 'rejections')
+
+
+class RandomStreams(object):
+    def __init__(self, seed=None):
+        """
+        a numpy generator per purpose, all derived from one SeedSequence,
+        seed is an int, a SeedSequence (spawned per replication) or None for fresh entropy
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        # same children as seed.spawn() would give, without changing the spawn counter of seed,
+        # so the streams of a replication can be recreated from it any number of times
+        children = [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,)) for i in range(len(STREAMS))]
+        self._generators = {name: np.random.default_rng(child) for name, child in zip(STREAMS, children)}
+
+    def __getitem__(self, name) -> np.random.Generator:
+        return self._generators[name]
+
+
+def get_replication_seeds(seed, n_sim) -> list:
+    """
+    independent, non-colliding seeds of n_sim replications
+    """
+    return np.random.SeedSequence(seed).spawn(n_sim)
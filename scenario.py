@@ -0,0 +1,102 @@
+import numpy as np
+
+from rng import RandomStreams
+from utils.env_variables import ProductParameters, CustomerParameters, OrderParameters
+from utils.helpers import Rounder
+
+
+class Scenario(object):
+    def __init__(self, n, streams=None):
+        """
+        draws every random attribute of n orders as whole arrays,
+        orders are later built from these arrays in one pass,
+        each attribute comes from its own stream of streams (a RandomStreams)
+        """
+        self.n = n
+        self._streams = RandomStreams() if streams is None else streams
+        self._product_probs = ProductParameters.get_probs()
+        self._customer_probs = CustomerParameters.get_probs()
+
+        self._get_order_arrivals()
+        self._get_order_products()
+        self._get_order_customers()
+        self._get_order_quantities()
+        self._get_process_times()
+        self._get_weights()
+        self._get_cancelations()
+        self._get_rejection_draws()
+
+    def _get_order_arrivals(self) -> None:
+        """
+        calculates order arrival times
+        using random exponential interarrivals
+        """
+        order_interarrivals = OrderParameters.get_interarrivals(size=self.n, rng=self._streams['arrivals'])
+        self.arrivals = np.cumsum(order_interarrivals)
+
+    def _get_order_products(self) -> None:
+        """
+        assigns order products randomly according to
+        the predefined product probabilities
+        """
+        product_probs_cdf = np.cumsum(self._product_probs)
+        self.product_types = self._determine_types(product_probs_cdf, self._streams['products'])
+
+    def _get_order_customers(self) -> None:
+        """
+        assigns order customers randomly according to
+        the predefined customer probabilities
+        """
+        customer_probs_cdf = np.cumsum(self._customer_probs)
+        self.customer_types = self._determine_types(customer_probs_cdf, self._streams['customers'])
+
+    def _determine_types(self, cdf, rng) -> np.ndarray:
+        rvs = rng.random(self.n)
+        types = np.searchsorted(cdf, rvs, side='right')
+        # guards against the cdf summing to slightly less than 1
+        return np.minimum(types, len(cdf) - 1)
+
+    def _get_order_quantities(self) -> None:
+        quantities = OrderParameters.get_quantities(self.product_types, self.customer_types, rng=self._streams['quantities'])
+        self.quantities = np.maximum(quantities, 1)
+
+    def _get_process_times(self) -> None:
+        """
+        unit process time is calculated with (expected p.t. * k)
+        """
+        product_params = [ProductParameters.get_params(i) for i in range(len(self._product_probs))]
+        expected_unit_process_times = np.array([loc + scale/2 for (loc, scale), _ in product_params])
+        self._unit_profits = np.array([unit_profit for _, unit_profit in product_params])
+
+        expected_unit = expected_unit_process_times[self.product_types]
+        multipliers = ProductParameters.get_uncertainty_multipliers(size=self.n, rng=self._streams['process_times'])
+        unit_process_times = Rounder.round(expected_unit * multipliers)
+
+        self.process_times = np.maximum(1, unit_process_times * self.quantities)
+        self.expected_process_times = Rounder.round(expected_unit * self.quantities)
+
+    def _get_weights(self) -> None:
+        customer_params = [CustomerParameters.get_params(i) for i in range(len(self._customer_probs))]
+        self._reliabilities = np.array([reliability for reliability, _, _ in customer_params])
+
+        weight_coefficients = CustomerParameters.get_weight_coefficients(self.customer_types, rng=self._streams['weights'])
+        weights = self.quantities * self._unit_profits[self.product_types] * \
+                  self._reliabilities[self.customer_types] * np.maximum(1, weight_coefficients)
+        self.weights = np.round(weights).astype(int)
+
+    def _get_cancelations(self) -> None:
+        """
+        cancelation offsets are relative to the arrival,
+        -1 marks the orders that are never canceled
+        """
+        rng = self._streams['cancelations']
+        cancels = rng.random(self.n) > self._reliabilities[self.customer_types]
+        offsets = CustomerParameters.get_cancelation_times(self.customer_types, rng=rng)
+        self.cancelation_offsets = np.where(cancels, offsets, -1)
+
+    def _get_rejection_draws(self) -> None:
+        """
+        one uniform per order for its due date decision, drawn up front so that the same order
+        makes the same decision on the same offer under every policy (common random numbers)
+        """
+        self.rejection_draws = self._streams['rejections'].random(self.n)
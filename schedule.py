@@ -1,5 +1,9 @@
+from bisect import bisect_left
+
 from order import Order
-import gurobipy as gp
+from fenwick import SparseFenwickTree
+from solvers import get_solver
+from solver_cache import CachedSolver, get_cache
 import numpy as np
 
 from utils.env_variables import OptimizationParameters
@@ -7,18 +11,62 @@ from utils.helpers import Rounder
 
 #from order import Order
 
+STATIC_RULES = ['FIFO', 'SPT', 'BWF']
+
 class JobQueue(object):
 
-    def __init__(self, policy, due_date_assigner):
+    def __init__(self, policy, due_date_assigner, incremental=True, solver=None, solver_cache=None):
         self._orders_unordered = [] # list of Order instances
         self._sequence = [] # list of Order instances
         self._policy = policy
         self._due_date_assigner = due_date_assigner
         
+        # static rules can keep the sequence sorted on precomputed keys instead of re-sorting it per event,
+        # self._keys holds (-priority, id) of self._sequence, so the next job is at the end of both
+        self._incremental = incremental and policy in STATIC_RULES
+        self._keys = []
+        self._new_order = None
+        # expected process times of the queued orders indexed by their static rank (see OrderTable.rank),
+        # a prefix sum up to an order is its expected completion time, sparse so that a queue holds
+        # memory for its own orders only and not for every order of the table
+        self._workload = None
+        # backend of the optimization rule, None picks OptimizationParameters.get_solver()
+        self._solver = get_solver(solver) if policy == 'optimization' else None
+        # solver_cache is True or the options of solver_cache.get_cache, solves of the same relative
+        # problem are then looked up instead of solved again
+        if self._solver is not None and solver_cache:
+            options = solver_cache if isinstance(solver_cache, dict) else {}
+            self._solver = CachedSolver(self._solver, get_cache(self._solver.settings, **options))
+        
     def add_order(self, new_order):
+        if self._incremental:
+            # tentative insert, set_schedule(confirm=False) takes it back
+            self._insert(new_order)
+            self._new_order = new_order
+            return
         self._orders_unordered.append(new_order)
         
+    def _insert(self, order) -> None:
+        table, row = order._table, order._row
+        if self._workload is None:
+            self._workload = SparseFenwickTree(table.n)
+        key = (-table.priority.item(row), table.id.item(row))
+        i = bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._sequence.insert(i, order)
+        self._workload.add(table.rank.item(row), table.expected_process_time.item(row))
+        
+    def _delete(self, order) -> None:
+        table, row = order._table, order._row
+        i = bisect_left(self._keys, (-table.priority.item(row), table.id.item(row)))
+        del self._keys[i]
+        del self._sequence[i]
+        self._workload.remove(table.rank.item(row), table.expected_process_time.item(row))
+        
     def remove_order(self, order):
+        if self._incremental:
+            self._delete(order)
+            return
         #print('remove_order called')
         # print(self._orders_unordered)
         # print(order)
@@ -33,10 +81,16 @@ class JobQueue(object):
         if len(self._sequence) == 0:
             return
         order = self._sequence.pop()
+        if self._incremental:
+            self._keys.pop()
+            self._workload.remove(order._table.rank.item(order._row), order._expected_process_time)
+            return order
         self._orders_unordered.remove(order)
         return order
         
     def reschedule(self, due_date_params=True, expected_remaining_time_on_machine=None, time_now=None) -> dict:
+        if self._incremental:
+            return self._quote(due_date_params)
         if self._policy == 'optimization':
             self.optimize(expected_remaining_time_on_machine=expected_remaining_time_on_machine, time_now=time_now)
         if self._policy != 'optimization':
@@ -61,22 +115,16 @@ class JobQueue(object):
             self._proposed_new_schedule = self._orders_unordered.copy()
             return
             
-        model = gp.Model('opt_model')
-        model.setParam('LogToConsole', 0)
-        #model.setParam('TimeLimit', 60)
-        model.setParam('MIPGap', OptimizationParameters.get_opt_gap())
-        a, b, p, d = [],[],[],[]
-        for i, order in enumerate(self._orders_unordered):
-            due_date_cost_coef = OptimizationParameters.get_due_date_cost_coef()
-            a.append(Rounder.round(order._weight*due_date_cost_coef)) #0.8 is given as an initial value will be changed most probabily, a is the due date cost for the new arrived job
-            b.append(order._weight) #tardiness cost
-            p.append(order._expected_process_time)  
-            if i != n-1:
-                d.append(order._due_date)
-            elif self._due_date_assigner.policy != 'SLK':
-                params = {'time_now':time_now, 'expected_process_time':self._orders_unordered[-1]._expected_process_time}
-                offered_due_date = np.round(self._due_date_assigner(**params)).astype(int)
-                d.append(offered_due_date)
+        weight, p, due_date, ids = self._get_columns(self._orders_unordered)
+        due_date_cost_coef = OptimizationParameters.get_due_date_cost_coef()
+        a = Rounder.round(weight*due_date_cost_coef).tolist() #0.8 is given as an initial value will be changed most probabily, a is the due date cost for the new arrived job
+        b = weight.tolist() #tardiness cost
+        d = due_date[:-1].tolist()
+        if self._due_date_assigner.policy != 'SLK':
+            params = {'time_now':time_now, 'expected_process_time':self._orders_unordered[-1]._expected_process_time,
+                      'order':self._orders_unordered[-1]}
+            offered_due_date = np.round(self._due_date_assigner(**params)).astype(int)
+            d.append(offered_due_date)
             
         # print() 
         # print('here')
@@ -88,59 +136,64 @@ class JobQueue(object):
         # print('remaining time:', expected_remaining_time_on_machine, time_now)
         # print('d_after: ', d)
 
-        I = range(n)
-        M= sum(p) + 1
-        L= [(i,j) for i in I for j in range(i+1,n)]
-        C = model.addVars(I, lb=0, vtype=gp.GRB.INTEGER, name='C')  # completion time of each job
-        T = model.addVars(I, lb=0, vtype=gp.GRB.INTEGER, name='T')  # tardiness for each job
-        Y = model.addVars(L,lb=0, vtype=gp.GRB.BINARY, name='Y')  # binary variables for job sequencing
-        
-
-        if self._due_date_assigner.policy == 'SLK':
-            # scheduling problem with due date assignment cost
-            if n > 2:
-                model.setObjective(a[n-1] * C[n-1] + gp.quicksum(b[i] * T[i] for i in range(n-1)), sense=gp.GRB.MINIMIZE)
-            else:
-                model.setObjective(a[n-1] * C[n-1] + b[0] * T[0], sense=gp.GRB.MINIMIZE)
-        else:
-            # simple scheduling problem
-            model.setObjective(gp.quicksum(b[i] * T[i] for i in range(n)), sense=gp.GRB.MINIMIZE)
-            
-        for i in I:
-            for j in range(i+1, n):
-                #print(i,j)
-                model.addConstr(C[i] <= C[j] - p[j] + M * (1 - Y[i,j]))
-                model.addConstr(C[j] <= C[i] - p[i] + M * (Y[i,j]))
-
-        if self._due_date_assigner.policy == 'SLK':
-            rng = n-1
-        else:
-            rng = n
-        for i in range(rng):
-            model.addConstr(T[i] >= C[i] - d[i])
-            model.addConstr(T[i] >= 0)
-
-        for i in I:
-            model.addConstr(C[i] >= p[i])
-
-        model.optimize()
-        if model.status == gp.GRB.INFEASIBLE:
-            print()
-            print(a)
-            print(b)
-            print(d)
-            print(p)
-            raise Exception('infeasible!!!')
-        c=[]
-        # print('c:', C)
-        for i in range(n):
-            c.append(C[i].x)
+        slk = self._due_date_assigner.policy == 'SLK'
+        # the confirmed sequence in processing order, a warm start for the solvers that use it
+        start = [order._id for order in reversed(self._sequence)]
+        c = self._solver.solve(a, b, p, d, slk, ids=ids, start=start)
         
         self._proposed_new_schedule = list(np.array(self._orders_unordered)[np.argsort(-np.array(c))])
         # print() 
             
     
+    @staticmethod
+    def _get_columns(orders):
+        """
+        weights, expected process times, due dates and ids of the orders,
+        in a time bounded run the orders can belong to different blocks of orders
+        """
+        table = orders[0]._table
+        if all(order._table is table for order in orders):
+            rows = [order._row for order in orders]
+            return table.weight[rows], table.expected_process_time[rows].tolist(), table.due_date[rows], table.id[rows].tolist()
+        weight = np.array([order._table.weight.item(order._row) for order in orders])
+        p = [order._table.expected_process_time.item(order._row) for order in orders]
+        due_date = np.array([order._table.due_date.item(order._row) for order in orders])
+        return weight, p, due_date, [order._id for order in orders]
+
+    def _quote(self, due_date_params) -> dict:
+        """
+        the sequence is already in order, only the due date parameters of the new order are left
+        """
+        if not due_date_params:
+            return {}
+        return {'expected_completion_time': self.get_expected_completion_time(self._new_order),
+                'expected_process_time': self._new_order._expected_process_time}
+    
+    def get_expected_completion_time(self, order):
+        """
+        expected time from the end of the job on the machine until the order is completed,
+        for an order that is not in the queue, as if it was inserted now (static rules only)
+        """
+        rank = order._table.rank.item(order._row)
+        return self._workload.prefix_sum(rank - 1) + order._expected_process_time
+    
+    def get_expected_completion_time_at(self, position):
+        """
+        expected completion time of the job that is processed position'th from now on (0 is the next job)
+        """
+        return self.get_expected_completion_time(self._sequence[-1 - position])
+    
+    def get_expected_workload(self):
+        if self._workload is None:
+            return 0
+        return self._workload.total()
+    
     def set_schedule(self, confirm) -> None:
+        if self._incremental:
+            if not confirm:
+                self._delete(self._new_order)
+            self._new_order = None
+            return
         if confirm:
             self._sequence = self._proposed_new_schedule.copy()
         else:
@@ -0,0 +1,107 @@
+import inspect
+from collections import OrderedDict
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from order import SCENARIO_DTYPES
+
+# blocks published by this process, their tracker registration belongs to the publisher
+_published = set()
+# python 3.13 and later can attach to a block without registering it with the resource tracker
+_CAN_UNTRACK = 'track' in inspect.signature(shared_memory.SharedMemory).parameters
+
+
+def _tracker_pid():
+    # pid of the resource tracker of this process, None when it uses one started by its parent or when
+    # the tracker does not expose it (its attributes are private and not the same in every python version)
+    tracker = getattr(resource_tracker, '_resource_tracker', None)
+    return getattr(tracker, '_pid', None)
+
+
+def _shares_tracker(descriptor) -> bool:
+    """
+    whether this process reports to the resource tracker of the publisher, the workers of a pool do
+    whatever the start method, forked ones inherit the tracker and spawned ones get its pipe,
+    a tracker that does not expose its pipe and pid is taken as one of its own
+    """
+    tracker = getattr(resource_tracker, '_resource_tracker', None)
+    if not hasattr(tracker, '_fd') or not hasattr(tracker, '_pid'):
+        return False
+    if tracker._fd is None:
+        # attaching starts a tracker of its own
+        return False
+    return tracker._pid is None or tracker._pid == descriptor.get('tracker')
+
+
+def publish(scenario):
+    """
+    copies the arrays of a Scenario into one shared memory block,
+    returns the block (the caller closes and unlinks it) and the picklable descriptor workers attach with
+    """
+    layout, offset = [], 0
+    for name, dtype in SCENARIO_DTYPES.items():
+        layout.append((name, np.dtype(dtype).str, offset))
+        offset += scenario.n * np.dtype(dtype).itemsize
+        offset += -offset % 8
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, dtype, offset in layout:
+        view = np.ndarray(scenario.n, dtype=dtype, buffer=block.buf, offset=offset)
+        view[:] = getattr(scenario, name)
+    _published.add(block.name)
+    descriptor = {'name': block.name, 'tracker': _tracker_pid(), 'n': scenario.n, 'layout': layout,
+                  'product_probs': list(scenario._product_probs), 'customer_probs': list(scenario._customer_probs)}
+    return block, descriptor
+
+
+class SharedScenario(object):
+    def __init__(self, descriptor):
+        """
+        read only views on a published scenario, used by OrderTable like a Scenario
+        """
+        if _CAN_UNTRACK:
+            self._block = shared_memory.SharedMemory(name=descriptor['name'], track=False)
+        else:
+            # the publisher owns the block, a tracker of this process must not unlink it when the process exits,
+            # a tracker shared with the publisher only holds the registration of the publisher, which it needs
+            # to unlink the block when the publisher dies before it does
+            shared = descriptor['name'] in _published or _shares_tracker(descriptor)
+            self._block = shared_memory.SharedMemory(name=descriptor['name'])
+            if not shared:
+                resource_tracker.unregister(self._block._name, 'shared_memory')
+        self.n = descriptor['n']
+        self._product_probs = descriptor['product_probs']
+        self._customer_probs = descriptor['customer_probs']
+        for name, dtype, offset in descriptor['layout']:
+            view = np.ndarray(self.n, dtype=dtype, buffer=self._block.buf, offset=offset)
+            view.flags.writeable = False
+            setattr(self, name, view)
+
+    def close(self) -> bool:
+        for name in SCENARIO_DTYPES:
+            if hasattr(self, name):
+                delattr(self, name)
+        try:
+            self._block.close()
+        except BufferError:
+            # an order table still uses the arrays
+            return False
+        return True
+
+
+# scenarios this process is attached to, the replications of one seed tend to follow each other
+_attached = OrderedDict()
+_MAX_ATTACHED = 8
+
+
+def attach(descriptor) -> SharedScenario:
+    name = descriptor['name']
+    scenario = _attached.get(name)
+    if scenario is not None:
+        _attached.move_to_end(name)
+        return scenario
+    scenario = _attached[name] = SharedScenario(descriptor)
+    while len(_attached) > _MAX_ATTACHED:
+        _, old = _attached.popitem(last=False)
+        old.close()
+    return scenario
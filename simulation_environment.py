@@ -1,85 +1,285 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 import multiprocessing 
 
 from schedule import JobQueue
 from heap import MinHeap
-from due_date_policies import CON, SLK, TWK
-from order import Order
+from due_date_policies import CON, SLK, TWK, QNT
+from order import OrderTable
+from scenario import Scenario
+from rng import RandomStreams, get_replication_seeds
+from horizon import OrderStream, StreamingStats
+from event_trace import TraceRecorder, IDLE
+from event_history import EventHistory, HISTORY_MODES, RING_SIZE
+from machines import MachineSet, QUEUE_MODES
+from profiling import Profile
+import lockstep
+from utils.helpers import RunningStats
 
-from utils.env_variables import ProductParameters, CustomerParameters, OrderParameters
 # from utils.helpers import Rounder
 
+# names of the values Environment.collect_stats returns, in order
+STAT_NAMES = ['tardiness_proportion', 'rejection_proportion',
+              'weighted_tardiness_proportion', 'weighted_rejection_proportion',
+              'avg_tardiness_amount', 'weighted_avg_tardiness_amount']
+
 class Simulation(object):
     def __init__(self, seed, **kwargs):
         self.seed = seed
         self.kwargs = kwargs
 
     @staticmethod
-    def run_environment(config):
+    def run_environment(config, scenario=None):
         n, due_date_policy_params, dispatching_rule = config['n'], config['due_date_policy_params'], config['dispatching_rule']
         simulation_time, warmup = None, None
         if 'simulation_time' in config:
             simulation_time = config['simulation_time']
         if 'warmup' in config:
             warmup = config['warmup']
+        incremental_queue = True
+        if 'incremental_queue' in config:
+            incremental_queue = config['incremental_queue']
+        lazy_events = True
+        if 'lazy_events' in config:
+            lazy_events = config['lazy_events']
+        solver = None
+        if 'solver' in config:
+            solver = config['solver']
+        solver_cache = None
+        if 'solver_cache' in config:
+            solver_cache = config['solver_cache']
+        in_flight = 'drain'
+        if 'in_flight' in config:
+            in_flight = config['in_flight']
+        trace = None
+        if 'trace' in config:
+            trace = config['trace']
+        profile = False
+        if 'profile' in config:
+            profile = config['profile']
+        # only the stats of a replication are returned, its events are not kept
+        history = 'off'
+        if 'history' in config:
+            history = config['history']
+        history_size = RING_SIZE
+        if 'history_size' in config:
+            history_size = config['history_size']
+        # one machine unless machines or speeds say otherwise, see ParallelEnvironment
+        machines, speeds, queues = 1, None, 'shared'
+        if 'machines' in config:
+            machines = config['machines']
+        if 'speeds' in config:
+            speeds = config['speeds']
+        if 'queues' in config:
+            queues = config['queues']
         seed = config['seed']
 
-        env = Environment(n=n, due_date_policy_params=due_date_policy_params, dispatching_rule=dispatching_rule, 
-                          seed=seed, simulation_time=simulation_time, warmup=warmup)
+        kwargs = {}
+        environment = Environment
+        if machines != 1 or speeds is not None:
+            kwargs = {'machines': machines, 'speeds': speeds, 'queues': queues}
+            environment = ParallelEnvironment
+        env = environment(n=n, due_date_policy_params=due_date_policy_params, dispatching_rule=dispatching_rule, 
+                          seed=seed, simulation_time=simulation_time, warmup=warmup, incremental_queue=incremental_queue,
+                          lazy_events=lazy_events, solver=solver, solver_cache=solver_cache, scenario=scenario,
+                          in_flight=in_flight, trace=trace, profile=profile, history=history, history_size=history_size,
+                          **kwargs)
         env.run_once()
         stats = env.collect_stats()
+        if env.profile is not None:
+            return stats, env.profile
         return stats
 
-    def run(self, n_sim, num_cores=-1) -> dict:
-        stat_names = {'tardiness_proportion':[], 'rejection_proportion':[],
-                       'weighted_tardiness_proportion':[], 'weighted_rejection_proportion':[],
-                       'avg_tardiness_amount':[], 'weighted_avg_tardiness_amount':[]}     
-        
+    @staticmethod
+    def _split_result(result):
+        """
+        stats and profile of a replication, the profile is None unless the config had profile=True
+        """
+        if len(result) == 2 and isinstance(result[1], Profile):
+            return result
+        return result, None
+
+    @staticmethod
+    def _run_replication(args):
+        i, config = args
+        return i, Simulation.run_environment(config)
+
+    def _set_num_cores(self, num_cores) -> None:
         if num_cores <= 0:
             self._num_cores = multiprocessing.cpu_count()
         else:
             self._num_cores = min(multiprocessing.cpu_count(), num_cores)
 
-        np.random.seed(self.seed)
-        self.env_seeds = np.random.randint(0, n_sim*100000, n_sim)
-
+    def _get_configs(self, seeds) -> list:
         args_list = []
-        for seed in self.env_seeds:
+        for seed in seeds:
             config = self.kwargs.copy()
             config['seed'] = seed
             args_list.append(config)
+        return args_list
+
+    def run(self, n_sim, num_cores=-1) -> dict:
+        self._set_num_cores(num_cores)
+        self.env_seeds = get_replication_seeds(self.seed, n_sim)
+        args_list = self._get_configs(self.env_seeds)
 
         with multiprocessing.Pool(processes=self._num_cores) as pool:
             results = pool.map(Simulation.run_environment, args_list)
+        results, profiles = zip(*[Simulation._split_result(result) for result in results])
         
-        stats = {name:[] for name in stat_names}
+        stats = {name:[] for name in STAT_NAMES}
         for result in results:
-            for i, name in enumerate(stat_names):
+            for i, name in enumerate(STAT_NAMES):
                 stats[name].append(result[i])
         self._stats_df = pd.DataFrame(stats)
         # return self._stats_df.mean().to_dict()
+        summary = self._stats_df.describe().to_dict()
+        self._add_profile(summary, profiles)
+        return summary
+
+    def _add_profile(self, summary, profiles) -> None:
+        """
+        merges the profiles of the workers into self.profile and the summary when the replications were profiled
+        """
+        profiles = [profile for profile in profiles if profile is not None]
+        self.profile = Profile.merged(profiles) if profiles else None
+        if self.profile is not None:
+            summary['profile'] = self.profile.to_dict()
+
+    def run_lockstep(self, n_sim, batch_size=None, num_cores=-1) -> dict:
+        """
+        same replications and summary as run for the static dispatching rules with CON or SLK due dates,
+        the replications of a worker are advanced together as arrays (see lockstep.py),
+        batch_size replications per batch, by default the replications are split evenly over the cores
+        """
+        lockstep.check_config(self.kwargs)
+        self._set_num_cores(num_cores)
+        self.env_seeds = get_replication_seeds(self.seed, n_sim)
+        if batch_size is None:
+            batch_size = int(np.ceil(n_sim / self._num_cores))
+        config = self.kwargs.copy()
+        batches = [(config, self.env_seeds[i:i + batch_size]) for i in range(0, n_sim, batch_size)]
+
+        if len(batches) == 1:
+            results = lockstep.run_batch(batches[0])
+        else:
+            with multiprocessing.Pool(processes=self._num_cores) as pool:
+                results = [result for batch in pool.map(lockstep.run_batch, batches) for result in batch]
+
+        stats = {name:[result[i] for result in results] for i, name in enumerate(STAT_NAMES)}
+        self._stats_df = pd.DataFrame(stats)
         return self._stats_df.describe().to_dict()
 
+    def run_sequential(self, targets, min_sim=5, max_sim=100, confidence=0.95, num_cores=-1) -> dict:
+        """
+        replicates until the confidence interval of every metric in targets is narrower than
+        its relative half width target (e.g. {'tardiness_proportion': 0.05}) or max_sim is reached,
+        replications are submitted in waves and the targets are checked after each wave,
+        so the number of replications only depends on the seed
+        """
+        self._set_num_cores(num_cores)
+        seed_sequence = np.random.SeedSequence(self.seed)
+        running = {name: RunningStats() for name in STAT_NAMES}
+        results, profiles = {}, {}
+        self.env_seeds = []
+
+        with multiprocessing.Pool(processes=self._num_cores) as pool:
+            wave = min(min_sim, max_sim)
+            while wave > 0:
+                # spawning in waves gives the same seeds as get_replication_seeds(self.seed, n)
+                seeds = seed_sequence.spawn(wave)
+                args_list = list(enumerate(self._get_configs(seeds), start=len(self.env_seeds)))
+                self.env_seeds += seeds
+                for i, result in pool.imap_unordered(Simulation._run_replication, args_list):
+                    result, profiles[i] = Simulation._split_result(result)
+                    results[i] = result
+                    for name, value in zip(STAT_NAMES, result):
+                        running[name].add(value)
+                wave = self._next_wave(running, targets, confidence, max_sim)
+
+        stats = {name:[results[i][k] for i in range(len(results))] for k, name in enumerate(STAT_NAMES)}
+        self._stats_df = pd.DataFrame(stats)
+        summary = self._stats_df.describe().to_dict()
+        for name, stat in running.items():
+            summary[name]['half_width'] = stat.half_width(confidence)
+            summary[name]['relative_half_width'] = stat.relative_half_width(confidence)
+        self._add_profile(summary, profiles.values())
+        return summary
+
+    def _next_wave(self, running, targets, confidence, max_sim) -> int:
+        """
+        number of replications to add, 0 once every target is met,
+        estimated from the current variance and rounded up to a multiple of the cores,
+        at most doubling the replications since early variance estimates are rough
+        """
+        stat = next(iter(running.values()))
+        done = stat.count + stat.missing
+        needed = done
+        for name, target in targets.items():
+            stat = running[name]
+            if stat.relative_half_width(confidence) <= target:
+                continue
+            estimate = np.nan
+            if stat.mean != 0 and stat.count >= 2:
+                # half width shrinks with the square root of the count
+                estimate = (stat.half_width(confidence) / (target * abs(stat.mean))) ** 2 * done
+            if not np.isfinite(estimate):
+                # nothing to estimate from yet, one more replication (a wave of the cores) at a time
+                needed = max(needed, done + 1)
+                continue
+            needed = max(needed, int(np.ceil(estimate)), done + 1)
+        if needed == done:
+            return 0
+        wave = int(np.ceil((needed - done) / self._num_cores)) * self._num_cores
+        return min(wave, max(done, self._num_cores), max_sim - done)
+
 
 
 class Environment(object):
-    def __init__(self, n, due_date_policy_params, dispatching_rule, seed, simulation_time=None, warmup=None):
-        self._product_probs = ProductParameters.get_probs()
-        self._customer_probs = CustomerParameters.get_probs()
+    def __init__(self, n, due_date_policy_params, dispatching_rule, seed, simulation_time=None, warmup=None, incremental_queue=True,
+                 lazy_events=True, solver=None, solver_cache=None, scenario=None, in_flight='drain',
+                 trace=None, profile=False, history=None, history_size=RING_SIZE):
         self.max_order_count = n
         self._due_date_policy = due_date_policy_params['policy']
-        self._due_date_policy_params = due_date_policy_params
+        # a copy, configs of several replications can share one dict
+        self._due_date_policy_params = dict(due_date_policy_params)
         del self._due_date_policy_params['policy']
         self._dispatching_rule = dispatching_rule
         self.seed = seed
         self.simulation_time = simulation_time
         self.warmup = warmup/2
+        self._incremental_queue = incremental_queue
+        # only the next job in the queue gets start/finish events in the heap,
+        # the rest follow from the sequence once they become the next job
+        self._lazy_events = lazy_events
+        # backend of the optimization rule, see solvers.py
+        self._solver = solver
+        self._solver_cache = solver_cache
+        # the orders of this seed generated beforehand (e.g. a SharedScenario), None generates them
+        self._scenario = scenario
+        # with simulation_time orders arrive until the horizon instead of n orders being created up front,
+        # the jobs that are in the system at the horizon are finished ('drain') or left out ('discard')
+        if in_flight not in ['drain', 'discard']:
+            raise ValueError(f'in_flight must be drain or discard, not {in_flight}')
+        self._in_flight = in_flight
+        # path of the binary event trace of run_once (see event_trace.py), None records nothing
+        self._trace_path = trace
+        # call counts and times of the hot methods (see profiling.py), None leaves the methods as they are
+        self.profile = Profile() if profile else None
+        # events kept for show_events(occured=True): 'off', the last history_size in a 'ring' or 'full',
+        # None keeps all of them unless orders arrive until simulation_time
+        if history not in [None] + HISTORY_MODES:
+            raise ValueError(f'history must be one of {HISTORY_MODES}, not {history}')
+        self._history = history
+        self._history_size = history_size
     
     def _initialize(self) -> None:
-        np.random.seed(self.seed)
-        self.event_heap = MinHeap()
+        self._streams = RandomStreams(self.seed)
+        horizon_mode = self.simulation_time is not None
+        history = self._history
+        if history is None:
+            history = 'off' if horizon_mode else 'full'
+        self.event_heap = MinHeap(history=None if history == 'off' else EventHistory(history, self._history_size))
         
         if self._due_date_policy == 'CON':
             self._due_date_assigner = CON(**self._due_date_policy_params)
@@ -87,80 +287,39 @@ class Environment(object):
             self._due_date_assigner = SLK(**self._due_date_policy_params)
         if self._due_date_policy == 'TWK':
             self._due_date_assigner = TWK(**self._due_date_policy_params)
+        if self._due_date_policy == 'QNT':
+            self._due_date_assigner = QNT(**self._due_date_policy_params)
 
-        self._queue = JobQueue(self._dispatching_rule, due_date_assigner=self._due_date_assigner)
+        self._queue = self._create_queue()
+        self._queues = [self._queue]
 
         self._time_now = 0
 
         self.machine_is_idle = True
         self._in_process = None
+        self._next_job = None
         
-        self._get_order_arrivals()
-        self._get_order_products()
-        self._get_order_customers()
-        self.orders_df = pd.DataFrame({'id':[i for i in range(self.max_order_count)] ,'arrival': self._order_arrivals, 
-                                       'product': self._order_prod_types, 'customer':self._order_customer_types})
-        self.orders_df['quantity'] = self.orders_df.apply(lambda row: Environment.get_order_quantity(row['product'], row['customer']), axis=1)
-        self.orders_df['quantity'] = self.orders_df['quantity'].apply(lambda x: max(x, 1))
-
-        self._orders = {}
-        # for i, row in self.orders_df.iterrows():
-        #     self._orders[i] = Order(arrival_time=row['arrival'], product_type=row['product'], customer_type=row['customer'], 
-        #             quantity=row['quantity'], dispatching_rule=self._dispatching_rule, env=self, order_id=i)
-        orders = self.orders_df.apply(Environment.create_order, axis=1, dispatching_rule=self._dispatching_rule, env=self)
-        self._orders = {i: order for i, order in enumerate(orders)}
-
-    @staticmethod      
-    def create_order(row, dispatching_rule, env):
-        return Order(arrival_time=row['arrival'], product_type=row['product'], customer_type=row['customer'], 
-                    quantity=row['quantity'], dispatching_rule=dispatching_rule, env=env, order_id=row['id'])
-    
-    def _get_order_arrivals(self) -> None:
-        """
-        calculates order arrival times
-        using random exponential interarrivals
-        """
-        order_interarrivals = OrderParameters.get_interarrivals(size=self.max_order_count)
-        self._order_arrivals = np.cumsum(order_interarrivals)
-        
-    def _get_order_products(self) -> None:
-        """
-        assigns order products randomly according to
-        the predefined product probabilities
-        """
-        product_probs_cdf = np.cumsum(self._product_probs)
-        self._order_prod_types = self._determine_types(product_probs_cdf)
-        
-    def _get_order_customers(self) -> None:
-        """
-        assigns order customers randomly according to
-        the predefined product probabilities
-        """
-        customer_probs_cdf = np.cumsum(self._customer_probs)
-        self._order_customer_types = self._determine_types(customer_probs_cdf)
-        
-    def _determine_types(self, cdf) -> list:
-        rvs = np.random.random(self.max_order_count)
-
-        idx = [rvs < cdf[0]] + \
-           [(cdf[i] < rvs) & (rvs < cdf[i+1]) for i in range(len(cdf)-2)] + \
-           [cdf[-2] < rvs]
-
-        types = pd.DataFrame(np.array(idx).transpose()).astype('int')
-        for col in types.columns:
-            types[col] = types[col].map({0:np.nan, 1:int(col)})
-        types['type'] = types.apply(lambda row: row.dropna().iloc[0], axis=1)
+        if horizon_mode:
+            self._order_table, self._orders = None, None
+            self._order_stream = OrderStream(self._streams, self._dispatching_rule, self, self.simulation_time)
+            self._stats = StreamingStats(self.simulation_time * self.warmup / 100,
+                                         self.simulation_time * (100 - self.warmup) / 100)
+            self._order_stream.schedule_next()
+            return
+        self._order_stream, self._stats = None, None
+
+        scenario = self._scenario
+        if scenario is None:
+            scenario = Scenario(self.max_order_count, self._streams)
+        self._order_table = OrderTable(scenario, dispatching_rule=self._dispatching_rule, env=self)
+        self._orders = self._order_table.create_orders()
+
+    def _create_queue(self) -> JobQueue:
+        # the incremental queue quotes from ranks over all orders, which a time bounded run does not have
+        return JobQueue(self._dispatching_rule, due_date_assigner=self._due_date_assigner,
+                        incremental=self._incremental_queue and self.simulation_time is None,
+                        solver=self._solver, solver_cache=self._solver_cache)
 
-        return types['type'].to_list()
-    
-    @staticmethod
-    def get_order_quantity(prod_id, customer_id) -> int:
-        # bu değişebilir
-        order_quantity_dist = OrderParameters.get_quantity_dist()
-
-        mean, std = order_quantity_dist[(prod_id, customer_id)]
-        return np.round(norm.rvs(loc=mean, scale=std, size=1)[0], 0)
-    
     def _get_expected_remaining_process_time(self):
         if self._in_process is None:
             return 0
@@ -169,6 +328,8 @@ class Environment(object):
         
     def arrival(self, order):
         self._new_order = order
+        if self._order_stream is not None:
+            self._order_stream.schedule_next()
         
         # if machine is idle, offer due date without rescheduling
         # if accepted, process the new order
@@ -179,6 +340,8 @@ class Environment(object):
                 
                 self._new_order.update_event_times(self._time_now)
                 self.machine_is_idle = False
+            else:
+                self._record(order)
         
         # if machine is busy, firstly reschedule the jobs and then offer due date
         else:
@@ -192,6 +355,7 @@ class Environment(object):
                 self._update_events()
             else:
                 self._queue.set_schedule(confirm=False)
+                self._record(order)
                 
     def cancelation(self, order):
         # process ediliyorsa cancel etme
@@ -202,6 +366,7 @@ class Environment(object):
         self._queue.reschedule(due_date_params=False, expected_remaining_time_on_machine=t, time_now = self._time_now)
         self._queue.set_schedule(confirm=True)
         self._update_events()
+        self._record(order)
         
     def start_job(self, job):
         self.machine_is_idle = False
@@ -210,12 +375,24 @@ class Environment(object):
         if (started_job is not None) and (started_job != job):
             # sıkıntı, detaylandıralım
             raise Exception('Problem', started_job._id, job._id)
+        if self._lazy_events:
+            self._next_job = None
+            self._update_events()
     
     def finish_job(self):
         self.machine_is_idle = True
-        if self._due_date_policy == 'TWK':
+        if self._due_date_policy in ['TWK', 'QNT']:
             self._due_date_assigner._add_order(self._in_process)
+        self._record(self._in_process)
         self._in_process = None
+
+    def _record(self, order) -> None:
+        """
+        the order left the system, a time bounded run adds it to the stats and forgets it
+        """
+        if self._stats is not None:
+            self._stats.add(order)
+            order.release_events()
         
     def _offer_due_date(self, params):
         #if self._in_process is None:
@@ -225,6 +402,7 @@ class Environment(object):
         # params['time_now'] = self._time_now
         params['expected_completion_time'] += t
         params['time_now'] = t
+        params['order'] = self._new_order
         # due_date = Rounder.round(self._due_date_assigner(**params))
         due_date = np.round(self._due_date_assigner(**params)).astype(int)
         return self._new_order.due_date_accepted(due_date, self._time_now)
@@ -236,20 +414,29 @@ class Environment(object):
             t = self._time_now #+ 1e-5
         else:
             t = self._in_process._event_job_finish.time #+ 1e-5
+        if self._lazy_events:
+            self._schedule_next_job(sequence, t)
+            return
         for order in reversed(sequence):
             # print('***', t)
             t = order.update_event_times(t)
             
-    def get_stats(self, order):
-        return order._id, order._customer._type, order._product._type, order._quantity, order.get_weight(), order._arrival_time, order._due_date, order._start_time, order._cancelation_time, order._finish_time, order.get_expected_process_time()
-    
+    def _schedule_next_job(self, sequence, t):
+        next_job = sequence[-1] if sequence else None
+        if self._next_job is not None and next_job is not self._next_job:
+            self._next_job.defer_events()
+        self._next_job = next_job
+        if next_job is not None:
+            next_job.update_event_times(t)
+            
     def show_stats(self):
-        stats_df = pd.DataFrame({'order':self._orders})
-
-        stats = stats_df['order'].apply(self.get_stats)
-        stats_df[['ID', 'customer type', 'product type', 'quantity','weight','arrival', 'due date','start','cancelled', 'finish', 'expected_process_time']] = pd.DataFrame(stats.tolist())
-        stats_df  = stats_df.drop('order', axis=1)
-        stats_df['weight'] = stats_df['weight'].astype(int)
+        if self._order_table is None:
+            raise Exception('orders are not kept when the run is bounded by simulation_time, see collect_stats')
+        table = self._order_table
+        stats_df = pd.DataFrame({'ID': table.id, 'customer type': table.customer, 'product type': table.product,
+                                 'quantity': table.quantity, 'weight': table.weight, 'arrival': table.arrival,
+                                 'due date': table.due_date, 'start': table.start, 'cancelled': table.cancelation,
+                                 'finish': table.finish, 'expected_process_time': table.expected_process_time}, copy=True)
         
         #START'TAN SONRA CANCEL EDİLENLERİN CANCELLED TİME'LARINI NONE'A ÇEVİR
         # customer reliabilityler 1 olunca burası hata veriyor
@@ -264,29 +451,79 @@ class Environment(object):
 
     def run_once(self, log=False):
         self._initialize()
+        if self.profile is not None:
+            self.profile.instrument(self)
+        recorder = None
+        if self._trace_path is not None:
+            recorder = TraceRecorder(self._trace_path)
+        try:
+            self._run_events(recorder, log)
+        finally:
+            # a replication that fails keeps the trace up to the failing event
+            if recorder is not None:
+                recorder.close()
+
+    def _occur_start(self, order):
+        order._start_time = self._time_now
+        order.prevent_cancelation()
+        self.start_job(order)
+
+    def _occur_finish(self, order):
+        order._finish_time = self._time_now
+        self.finish_job()
+
+    def _occur_cancelation(self, order):
+        order.cancel()
+        self.cancelation(order)
+
+    def _get_handlers(self) -> tuple:
+        """
+        the handler of each event type by its code, looked up once per run so instrumented methods are used
+        """
+        return self._occur_finish, self._occur_start, self.arrival, self._occur_cancelation
+
+    def _run_events(self, recorder, log):
+        handlers = self._get_handlers()
         while not self.event_heap.is_empty():
+            if (self._order_stream is not None and self._in_flight == 'discard'
+                    and self.event_heap.get_imminent_time() > self.simulation_time):
+                break
             if log:
                 print('--------')
             #print('here')
             event, time = self.event_heap.get_imminent_event()
             self._time_now = time
-            event.occur()
+            handlers[event.type](event.order)
+
+            if recorder is not None:
+                recorder.record(time, event.type, event.order._id, *self._get_trace_state(event.order))
             
             if log:
                 print(event)
-                print('machine after event')
-                if self._in_process is not None:
-                    print(self._in_process._id)
-                else:
-                    print('idle')
-                print('queue after event')
-                print([job._id for job in reversed(self._queue._sequence)])
-                #print([job._expected_process_time for job in reversed(self._queue._sequence)])
+                self._log_state()
                 print()
                 print('--------')
                 print()    
 
+    def _get_trace_state(self, order) -> tuple:
+        """
+        queue length and job on the machine recorded with an event of order
+        """
+        return len(self._queue._sequence), IDLE if self._in_process is None else self._in_process._id
+
+    def _log_state(self) -> None:
+        print('machine after event')
+        if self._in_process is not None:
+            print(self._in_process._id)
+        else:
+            print('idle')
+        print('queue after event')
+        print([job._id for job in reversed(self._queue._sequence)])
+        #print([job._expected_process_time for job in reversed(self._queue._sequence)])
+
     def collect_stats(self):
+        if self._stats is not None:
+            return self._stats.get_stats()
         stats = self.show_stats()
         
         # Calculate the indices for the middle portion
@@ -322,4 +559,186 @@ class Environment(object):
 
         return tardiness_prop, rejection_prop, weighted_tardiness_prop, weighted_rejection_prop, avg_tardiness_amount, weighted_avg_tardiness_amount
 
-        
\ No newline at end of file
+        
+
+class ParallelEnvironment(Environment):
+    def __init__(self, *args, machines=2, speeds=None, queues='shared', **kwargs):
+        """
+        machines identical machines, or uniform ones with speeds (a job takes process time / speed),
+        orders wait in one queue and the next job goes to the machine that is free first ('shared'),
+        or they are routed on arrival to the machine expected to complete them first and wait in its
+        queue ('machine'), the optimization rule sequences the queue of one machine so it needs
+        queues='machine' and identical machines, the next job of a queue has the only start and finish events
+        """
+        super().__init__(*args, **kwargs)
+        self._speeds = [1] * machines if speeds is None else list(speeds)
+        if len(self._speeds) != machines:
+            raise ValueError(f'{len(self._speeds)} speeds for {machines} machines')
+        if queues not in QUEUE_MODES:
+            raise ValueError(f'queues must be one of {QUEUE_MODES}, not {queues}')
+        if self._dispatching_rule == 'optimization' and (queues != 'machine' or len(set(self._speeds)) > 1):
+            raise ValueError('the optimization rule needs identical machines with queues=machine')
+        if not self._lazy_events:
+            raise ValueError('several machines only plan the next job of a queue, lazy_events must be True')
+        self._queue_mode = queues
+
+    def _initialize(self) -> None:
+        super()._initialize()
+        self.machines = MachineSet(self._speeds)
+        if self._queue_mode == 'machine':
+            self._queues = [self._queue] + [self._create_queue() for _ in range(1, self.machines.count)]
+        self._next_jobs = [None] * len(self._queues)
+
+    def _get_queue_index(self, order):
+        return 0 if self._queue_mode == 'shared' else order._machine
+
+    def _get_expected_remaining_process_time(self):
+        # only asked with a shared queue, the queue of a machine uses the remaining time of its own machine
+        return self.machines.first_remaining(self._time_now)
+
+    def arrival(self, order):
+        self._new_order = order
+        if self._order_stream is not None:
+            self._order_stream.schedule_next()
+        machines = self.machines
+        p = order._expected_process_time
+
+        if self._queue_mode == 'shared':
+            k = machines.fastest_idle()
+            if k is not None and not self._queue.get_sequence():
+                self._accept_on_idle(order, k)
+                return
+            queue = self._queue
+            queue.add_order(order)
+            remaining = self._get_expected_remaining_process_time()
+            params = queue.reschedule(due_date_params=True, expected_remaining_time_on_machine=remaining,
+                                      time_now=self._time_now)
+            # the queued work processed before the order, shared by the machines
+            remaining, start = machines.expected_start(self._time_now, params['expected_completion_time'] - p)
+            accepted = self._offer(remaining, start + p * machines.count / sum(machines.speeds))
+        else:
+            k = machines.route(self._time_now, p)
+            queue = self._queues[k]
+            if machines.jobs[k] is None and self._next_jobs[k] is None:
+                self._accept_on_idle(order, k)
+                return
+            queue.add_order(order)
+            remaining = machines.remaining(k, self._time_now)
+            params = queue.reschedule(due_date_params=True, expected_remaining_time_on_machine=remaining,
+                                      time_now=self._time_now)
+            accepted = self._offer(remaining, remaining + params['expected_completion_time'] / machines.speeds[k])
+            if accepted:
+                order._machine = k
+                machines.add_work(k, p / machines.speeds[k])
+
+        if accepted:
+            queue.set_schedule(confirm=True)
+            self._update_events(self._get_queue_index(order))
+        else:
+            queue.set_schedule(confirm=False)
+            self._record(order)
+
+    def _accept_on_idle(self, order, k) -> None:
+        # nothing waits for the idle machine k, the order starts right away if it is accepted
+        speed = self.machines.speeds[k]
+        if self._offer(0, order._expected_process_time / speed):
+            order._machine = k
+            order.update_event_times(self._time_now, speed)
+        else:
+            self._record(order)
+
+    def _offer(self, remaining, completion) -> bool:
+        """
+        due date offer of the new order, a machine is expected to be free remaining from now
+        and the order to be completed completion from now
+        """
+        order = self._new_order
+        params = {'expected_completion_time': self._time_now + completion,
+                  'expected_process_time': order._expected_process_time,
+                  'time_now': self._time_now + remaining, 'order': order}
+        due_date = np.round(self._due_date_assigner(**params)).astype(int)
+        return order.due_date_accepted(due_date, self._time_now)
+
+    def cancelation(self, order):
+        q = self._get_queue_index(order)
+        queue = self._queues[q]
+        queue.remove_order(order)
+        if self._queue_mode == 'machine':
+            self.machines.add_work(q, -order._expected_process_time / self.machines.speeds[q])
+            remaining = self.machines.remaining(q, self._time_now)
+        else:
+            remaining = self._get_expected_remaining_process_time()
+        queue.reschedule(due_date_params=False, expected_remaining_time_on_machine=remaining, time_now=self._time_now)
+        queue.set_schedule(confirm=True)
+        if self._next_jobs[q] is order:
+            # its events were removed with the order
+            self._next_jobs[q] = None
+        self._update_events(q)
+        self._record(order)
+
+    def start_job(self, job):
+        k = job._machine
+        q = self._get_queue_index(job)
+        started_job = self._queues[q].pop_order()
+        if (started_job is not None) and (started_job != job):
+            raise Exception('Problem', started_job._id, job._id)
+        machines = self.machines
+        if started_job is not None:
+            self._next_jobs[q] = None
+            if self._queue_mode == 'machine':
+                machines.add_work(k, -job._expected_process_time / machines.speeds[k])
+        machines.start(k, job, self._time_now, job._event_job_finish.time)
+        self._update_events(q)
+
+    def _occur_finish(self, order):
+        order._finish_time = self._time_now
+        self.finish_job(order)
+
+    def finish_job(self, job):
+        k = job._machine
+        self.machines.finish(k)
+        if self._due_date_policy in ['TWK', 'QNT']:
+            self._due_date_assigner._add_order(job)
+        self._record(job)
+        self._update_events(self._get_queue_index(job))
+
+    def _update_events(self, q=0):
+        """
+        plans the next job of queue q on the machine that is free first, a shared queue
+        waits for the fastest idle machine or the busy machine that finishes first
+        """
+        sequence = self._queues[q].get_sequence()
+        next_job = sequence[-1] if sequence else None
+        machines = self.machines
+        k, t = q, None
+        if next_job is not None:
+            if self._queue_mode == 'shared':
+                k = machines.fastest_idle()
+                if k is None:
+                    t, k = machines.earliest_finish()
+            elif machines.jobs[k] is not None:
+                t = machines.finishes[k]
+        if self._next_jobs[q] is not None and next_job is not self._next_jobs[q]:
+            self._next_jobs[q].defer_events()
+        self._next_jobs[q] = next_job
+        if next_job is not None:
+            next_job._machine = k
+            next_job.update_event_times(self._time_now if t is None else t, machines.speeds[k])
+
+    def show_stats(self):
+        stats_df = super().show_stats()
+        stats_df['machine'] = self._order_table.machine
+        return stats_df
+
+    def _get_trace_state(self, order) -> tuple:
+        # the queue of the order and the job on its machine
+        k = order._machine
+        job = None if k < 0 else self.machines.jobs[k]
+        return len(self._queues[self._get_queue_index(order) if k >= 0 else 0]._sequence), IDLE if job is None else job._id
+
+    def _log_state(self) -> None:
+        print('machines after event')
+        print([None if job is None else job._id for job in self.machines.jobs])
+        print('queues after event')
+        for queue in self._queues:
+            print([job._id for job in reversed(queue._sequence)])
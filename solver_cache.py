@@ -0,0 +1,154 @@
+import os
+import hashlib
+import tempfile
+import pickle
+from collections import OrderedDict
+
+from solvers import get_costs, completion_times
+from utils.env_variables import OptimizationParameters
+
+# of the signatures and the stored entries, bumped when either changes so old stores are not read
+CACHE_VERSION = 2
+
+
+def get_signature(a, b, p, d, slk, settings):
+    """
+    the problem only depends on the multiset of (tardiness weight, process time, relative due date)
+    of the jobs, the answer also on the solver and its settings (see the settings of the solvers),
+    returns (version, settings, sorted jobs) and the job index of each position in the sorted jobs
+    """
+    weights, due_dates = get_costs(a, b, d, slk)
+    jobs = [(float(w), float(p_j), float(due_date)) for w, p_j, due_date in zip(weights, p, due_dates)]
+    order = sorted(range(len(jobs)), key=jobs.__getitem__)
+    return (CACHE_VERSION, tuple(settings), tuple(jobs[i] for i in order)), order
+
+
+class SolverCache(object):
+    def __init__(self, settings, max_entries=None, max_bytes=None, directory=None):
+        """
+        lru cache of the sequences one solver with the given settings returned, keyed on the problem signature,
+        with directory set every solve is also written there, under the version and the settings,
+        and read back by later runs
+        """
+        self.settings = tuple(settings)
+        self.max_entries = OptimizationParameters.get_cache_entries() if max_entries is None else max_entries
+        self.max_bytes = OptimizationParameters.get_cache_bytes() if max_bytes is None else max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries = OrderedDict() # signature -> (sequence, bytes)
+        self.nbytes = 0
+        self.hits, self.misses, self.evictions, self.disk_hits = 0, 0, 0, 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, signature):
+        """
+        sequence of signature positions or None
+        """
+        entry = self._entries.get(signature)
+        if entry is not None:
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry[0]
+        if self.directory is not None:
+            sequence = self._read(signature)
+            if sequence is not None:
+                self.disk_hits += 1
+                self._store(signature, sequence)
+                return sequence
+        self.misses += 1
+        return None
+
+    def put(self, signature, sequence) -> None:
+        self._store(signature, sequence)
+        if self.directory is not None:
+            self._write(signature, sequence)
+
+    def _store(self, signature, sequence) -> None:
+        sequence = tuple(sequence)
+        # a job is three floats in the signature and an int in the sequence
+        size = 128 + 40 * len(signature[2])
+        old = self._entries.pop(signature, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._entries[signature] = (sequence, size)
+        self.nbytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def _path(self, signature):
+        digest = hashlib.sha1(repr(signature).encode()).hexdigest()
+        settings = '-'.join(str(setting) for setting in self.settings)
+        return os.path.join(self.directory, f'v{CACHE_VERSION}', settings, digest[:2], digest)
+
+    def _read(self, signature):
+        try:
+            with open(self._path(signature), 'rb') as f:
+                stored_signature, sequence = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # guards against digest collisions, and entries of other solvers or versions
+        if stored_signature != signature:
+            return None
+        return sequence
+
+    def _write(self, signature, sequence) -> None:
+        path = self._path(signature)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first so that parallel workers never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((signature, tuple(sequence)), f)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+class CachedSolver(object):
+    def __init__(self, solver, cache):
+        """
+        looks the problem up in the cache before calling the solver, the cache must hold the sequences
+        of a solver with the same settings, the warm start is not part of the key, so with a nonzero gap
+        a cached sequence is only guaranteed to be as good as a new solve within the gap, not the same
+        """
+        if tuple(solver.settings) != cache.settings:
+            raise ValueError(f'the cache holds the sequences of {cache.settings}, not of {solver.settings}')
+        self.name = solver.name
+        self.solver = solver
+        self.cache = cache
+        self.runtime = None
+
+    def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+        signature, order = get_signature(a, b, p, d, slk, self.cache.settings)
+        cached = self.cache.get(signature)
+        if cached is not None:
+            self.runtime = None
+            return completion_times([order[k] for k in cached], p)
+
+        c = self.solver.solve(a, b, p, d, slk, ids=ids, start=start)
+        self.runtime = getattr(self.solver, 'runtime', None)
+        position = {j: k for k, j in enumerate(order)}
+        sequence = sorted(range(len(p)), key=lambda j: c[j])
+        self.cache.put(signature, [position[j] for j in sequence])
+        return c
+
+
+# caches of this process by solver settings and options, replications run by the same worker
+# with the same solver share one
+_caches = {}
+
+
+def get_cache(settings, max_entries=None, max_bytes=None, directory=None) -> SolverCache:
+    key = (tuple(settings), max_entries, max_bytes, directory)
+    if key not in _caches:
+        _caches[key] = SolverCache(settings, max_entries=max_entries, max_bytes=max_bytes, directory=directory)
+    return _caches[key]
@@ -0,0 +1,427 @@
+import time
+
+try:
+    import gurobipy as gp
+except ImportError:
+    gp = None
+
+from utils.env_variables import OptimizationParameters
+
+
+def get_costs(a, b, d, slk):
+    """
+    tardiness weights and due dates of the jobs, under SLK the last (new) job
+    has no due date yet and costs a*C instead, which is tardiness against due date 0
+    """
+    if slk:
+        return list(b[:-1]) + [a[-1]], list(d[:len(b)-1]) + [0]
+    return list(b), list(d)
+
+
+def evaluate(sequence, p, weights, due_dates):
+    """
+    objective value of processing the jobs in sequence without idle time
+    """
+    t, cost = 0, 0
+    for j in sequence:
+        t += p[j]
+        if t > due_dates[j]:
+            cost += weights[j] * (t - due_dates[j])
+    return cost
+
+
+def start_sequence(ids, start):
+    """
+    positions of the jobs in the order of the ids in start,
+    jobs that are not in start (the new job) follow in their own order
+    """
+    positions = {job_id: i for i, job_id in enumerate(ids)}
+    sequence = [positions[job_id] for job_id in start if job_id in positions]
+    if len(sequence) < len(ids):
+        seen = set(sequence)
+        sequence += [i for i in range(len(ids)) if i not in seen]
+    return sequence
+
+
+def completion_times(sequence, p):
+    c = [0] * len(p)
+    t = 0
+    for j in sequence:
+        t += p[j]
+        c[j] = t
+    return c
+
+
+class GurobiSolver(object):
+    def __init__(self):
+        """
+        big-M MIP of the single machine problem, solved from scratch on every call
+        """
+        if gp is None:
+            raise ImportError('the gurobi solver needs gurobipy, use the branch_and_bound solver without it')
+        self.name = 'gurobi'
+        self.runtime = None # seconds gurobi spent in the last optimize
+        self._gap = OptimizationParameters.get_opt_gap()
+        # what the sequences it returns depend on besides the problem, solver caches are keyed on it
+        self.settings = (self.name, self._gap)
+
+    def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+        """
+        returns the completion times of the jobs, d is relative to the time the machine gets free
+        """
+        n = len(p)
+        model = gp.Model('opt_model')
+        model.setParam('LogToConsole', 0)
+        #model.setParam('TimeLimit', 60)
+        model.setParam('MIPGap', self._gap)
+
+        I = range(n)
+        M= sum(p) + 1
+        L= [(i,j) for i in I for j in range(i+1,n)]
+        C = model.addVars(I, lb=0, vtype=gp.GRB.INTEGER, name='C')  # completion time of each job
+        T = model.addVars(I, lb=0, vtype=gp.GRB.INTEGER, name='T')  # tardiness for each job
+        Y = model.addVars(L,lb=0, vtype=gp.GRB.BINARY, name='Y')  # binary variables for job sequencing
+
+        if slk:
+            # scheduling problem with due date assignment cost
+            if n > 2:
+                model.setObjective(a[n-1] * C[n-1] + gp.quicksum(b[i] * T[i] for i in range(n-1)), sense=gp.GRB.MINIMIZE)
+            else:
+                model.setObjective(a[n-1] * C[n-1] + b[0] * T[0], sense=gp.GRB.MINIMIZE)
+        else:
+            # simple scheduling problem
+            model.setObjective(gp.quicksum(b[i] * T[i] for i in range(n)), sense=gp.GRB.MINIMIZE)
+
+        for i in I:
+            for j in range(i+1, n):
+                model.addConstr(C[i] <= C[j] - p[j] + M * (1 - Y[i,j]))
+                model.addConstr(C[j] <= C[i] - p[i] + M * (Y[i,j]))
+
+        if slk:
+            rng = n-1
+        else:
+            rng = n
+        for i in range(rng):
+            model.addConstr(T[i] >= C[i] - d[i])
+            model.addConstr(T[i] >= 0)
+
+        for i in I:
+            model.addConstr(C[i] >= p[i])
+
+        model.optimize()
+        self.runtime = model.Runtime
+        if model.status == gp.GRB.INFEASIBLE:
+            print()
+            print(a)
+            print(b)
+            print(d)
+            print(p)
+            raise Exception('infeasible!!!')
+        return [C[i].x for i in range(n)]
+
+
+class IncrementalGurobiSolver(object):
+    def __init__(self):
+        """
+        the big-M MIP of GurobiSolver kept in one model between calls, consecutive calls differ
+        by a job or two so only their variables and constraints are added or removed,
+        the shifted due dates are constraint right hand sides and the previous sequence is the MIP start
+        """
+        if gp is None:
+            raise ImportError('the gurobi solver needs gurobipy, use the branch_and_bound solver without it')
+        self.name = 'gurobi_incremental'
+        self.runtime = None
+        self.settings = (self.name, OptimizationParameters.get_opt_gap())
+        self._model = gp.Model('opt_model')
+        self._model.setParam('LogToConsole', 0)
+        self._model.setParam('MIPGap', self.settings[1])
+        self._M = 0
+
+        # per job id: completion time and tardiness variables, the tardiness constraint and the process time
+        self._C, self._T, self._tardiness, self._p = {}, {}, {}, {}
+        # self._pairs[u][v] = (first, Y, c1, c2) for every pair of jobs, stored under both ids,
+        # Y = 1 means first is processed before the other job
+        self._pairs = {}
+
+    def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+        """
+        returns the completion times of the jobs, d is relative to the time the machine gets free,
+        ids identify the jobs between calls and start is the previous sequence of ids
+        """
+        weights, due_dates = get_costs(a, b, d, slk)
+        # jobs of the last call that are gone now, a rejected offer is only dropped here
+        keep = set(ids)
+        for job_id in [job_id for job_id in self._C if job_id not in keep]:
+            self._remove_job(job_id)
+
+        required = sum(p) + 1
+        if required > self._M:
+            self._set_big_m(2 * required)
+        for job_id, p_j in zip(ids, p):
+            if job_id not in self._C:
+                self._add_job(job_id, p_j)
+
+        model = self._model
+        model.setAttr('RHS', [self._tardiness[job_id] for job_id in ids], [-due_date for due_date in due_dates])
+        model.setAttr('Obj', [self._T[job_id] for job_id in ids], weights)
+        self._set_start(ids, p, due_dates, start)
+
+        model.optimize()
+        self.runtime = model.Runtime
+        if model.status == gp.GRB.INFEASIBLE:
+            raise Exception('infeasible!!!')
+        return [self._C[job_id].x for job_id in ids]
+
+    def _add_job(self, job_id, p_j) -> None:
+        model, M = self._model, self._M
+        C = model.addVar(lb=p_j, vtype=gp.GRB.INTEGER)
+        T = model.addVar(lb=0, vtype=gp.GRB.INTEGER)
+        self._tardiness[job_id] = model.addConstr(T - C >= 0)
+        pairs = {}
+        for other, C_other in self._C.items():
+            p_other = self._p[other]
+            Y = model.addVar(vtype=gp.GRB.BINARY)
+            c1 = model.addConstr(C_other - C + M * Y <= M - p_j)
+            c2 = model.addConstr(C - C_other - M * Y <= -p_other)
+            pair = (other, Y, c1, c2)
+            pairs[other] = pair
+            self._pairs[other][job_id] = pair
+        self._pairs[job_id] = pairs
+        self._C[job_id], self._T[job_id], self._p[job_id] = C, T, p_j
+
+    def _remove_job(self, job_id) -> None:
+        model = self._model
+        for other, (first, Y, c1, c2) in self._pairs.pop(job_id).items():
+            model.remove([c1, c2])
+            model.remove(Y)
+            del self._pairs[other][job_id]
+        model.remove(self._tardiness.pop(job_id))
+        model.remove(self._C.pop(job_id))
+        model.remove(self._T.pop(job_id))
+        del self._p[job_id]
+
+    def _set_big_m(self, M) -> None:
+        """
+        M grows geometrically, so the pair constraints are rewritten only a logarithmic number of times
+        """
+        self._M = M
+        model = self._model
+        for job_id, pairs in self._pairs.items():
+            for other, (first, Y, c1, c2) in pairs.items():
+                if first != job_id:
+                    continue
+                model.chgCoeff(c1, Y, M)
+                model.chgCoeff(c2, Y, -M)
+                c1.RHS = M - self._p[other]
+
+    def _set_start(self, ids, p, due_dates, start) -> None:
+        if start is None:
+            return
+        sequence = start_sequence(ids, start)
+        completion = completion_times(sequence, p)
+        C = [self._C[job_id] for job_id in ids]
+        T = [self._T[job_id] for job_id in ids]
+        self._model.setAttr('Start', C, completion)
+        self._model.setAttr('Start', T, [max(0, c - due_date) for c, due_date in zip(completion, due_dates)])
+        finish = {job_id: c for job_id, c in zip(ids, completion)}
+        Y, values = [], []
+        for job_id in ids:
+            for other, (first, Y_pair, c1, c2) in self._pairs[job_id].items():
+                if first == job_id:
+                    Y.append(Y_pair)
+                    values.append(1 if finish[first] < finish[other] else 0)
+        self._model.setAttr('Start', Y, values)
+
+
+class BranchAndBoundSolver(object):
+    def __init__(self, node_limit=None, time_limit=None, gap=None):
+        """
+        depth first branch and bound that fixes the jobs from the last position backwards,
+        stops with the best sequence found when the node or time budget runs out
+        or when the root bound proves the incumbent within the gap
+        """
+        self.name = 'branch_and_bound'
+        self._node_limit = OptimizationParameters.get_node_limit() if node_limit is None else node_limit
+        self._time_limit = OptimizationParameters.get_time_limit() if time_limit is None else time_limit
+        self._gap = OptimizationParameters.get_opt_gap() if gap is None else gap
+        self.settings = (self.name, self._gap, self._node_limit, self._time_limit)
+
+        self.nodes = 0
+        self.optimal = None
+
+    def solve(self, a, b, p, d, slk, ids=None, start=None) -> list:
+        """
+        returns the completion times of the jobs, d is relative to the time the machine gets free,
+        start is a sequence of ids that is tried as one more initial solution
+        """
+        weights, due_dates = get_costs(a, b, d, slk)
+        initial = None
+        if ids is not None and start is not None:
+            initial = start_sequence(ids, start)
+        sequence = self.search(list(p), weights, due_dates, initial)
+        return completion_times(sequence, p)
+
+    def search(self, p, weights, due_dates, initial=None) -> list:
+        n = len(p)
+        self.nodes = 0
+        self.optimal = True
+        if n <= 1:
+            return list(range(n))
+
+        self._p, self._w, self._d = p, weights, due_dates
+        # smith's rule order for the weighted completion time bound
+        self._ratio_order = sorted(range(n), key=lambda j: p[j] / weights[j] if weights[j] > 0 else float('inf'))
+        self._deadline = None if self._time_limit is None else time.perf_counter() + self._time_limit
+        self._best_sequence, self._best_cost = self._initial_solution(initial)
+        self._best_values = {}
+        self._tail = []
+
+        full = (1 << n) - 1
+        root_bound = self._lower_bound(full, sum(p))
+        if self._best_cost - root_bound <= self._gap * self._best_cost:
+            # the heuristic is already good enough
+            self.optimal = self._best_cost == root_bound
+            return self._best_sequence
+
+        try:
+            self._branch(full, sum(p), 0, None)
+        except _BudgetExceeded:
+            self.optimal = False
+        return self._best_sequence
+
+    def _cost(self, j, t):
+        late = t - self._d[j]
+        return self._w[j] * late if late > 0 else 0
+
+    def _initial_solution(self, initial=None):
+        """
+        best of a few dispatching heuristics, improved by adjacent pairwise interchanges
+        """
+        p, w, d = self._p, self._w, self._d
+        n = len(p)
+        candidates = [self._ratio_order,
+                      sorted(range(n), key=lambda j: d[j]),
+                      self._apparent_tardiness_cost()]
+        if initial is not None:
+            candidates.append(initial)
+        best_sequence, best_cost = None, None
+        for sequence in candidates:
+            sequence = self._interchange(list(sequence))
+            cost = evaluate(sequence, p, w, d)
+            if best_cost is None or cost < best_cost:
+                best_sequence, best_cost = sequence, cost
+        return best_sequence, best_cost
+
+    def _apparent_tardiness_cost(self, k=2.0):
+        p, w, d = self._p, self._w, self._d
+        remaining = set(range(len(p)))
+        p_mean = sum(p) / len(p)
+        t, sequence = 0, []
+        while remaining:
+            def priority(j):
+                slack = max(0, d[j] - p[j] - t)
+                return w[j] / p[j] * 2.718281828459045 ** (-slack / (k * p_mean))
+            j = max(remaining, key=priority)
+            remaining.remove(j)
+            sequence.append(j)
+            t += p[j]
+        return sequence
+
+    def _interchange(self, sequence):
+        p = self._p
+        improved = True
+        while improved:
+            improved = False
+            t = 0
+            for i in range(len(sequence) - 1):
+                j, k = sequence[i], sequence[i+1]
+                before = self._cost(j, t + p[j]) + self._cost(k, t + p[j] + p[k])
+                after = self._cost(k, t + p[k]) + self._cost(j, t + p[k] + p[j])
+                if after < before:
+                    sequence[i], sequence[i+1] = k, j
+                    improved = True
+                    j = k
+                t += p[j]
+        return sequence
+
+    def _lower_bound(self, mask, t_end):
+        """
+        max of the tardiness every job has on its own and the weighted completion time bound
+        over the jobs that are tardy if they are processed last
+        """
+        p, w, d = self._p, self._w, self._d
+        single, weighted_completion, weighted_due_dates, t = 0, 0, 0, 0
+        for j in self._ratio_order:
+            if not (mask >> j) & 1:
+                continue
+            if p[j] > d[j]:
+                single += w[j] * (p[j] - d[j])
+            if d[j] < t_end:
+                t += p[j]
+                weighted_completion += w[j] * t
+                weighted_due_dates += w[j] * d[j]
+        return max(single, weighted_completion - weighted_due_dates)
+
+    def _branch(self, mask, t_end, tail_cost, next_job):
+        """
+        mask holds the jobs that are processed before t_end, the jobs after t_end are fixed with tail_cost
+        """
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes > self._node_limit:
+            raise _BudgetExceeded()
+        if self._deadline is not None and not self.nodes & 255 and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+        if mask == 0:
+            if tail_cost < self._best_cost:
+                self._best_cost = tail_cost
+                self._best_sequence = self._tail[::-1]
+            return
+
+        # the same jobs before t_end were already explored with a cheaper tail
+        best_value = self._best_values.get(mask)
+        if best_value is not None and best_value <= tail_cost:
+            return
+        self._best_values[mask] = tail_cost
+
+        if tail_cost + self._lower_bound(mask, t_end) >= self._best_cost:
+            return
+
+        p, d = self._p, self._d
+        jobs = [j for j in range(len(p)) if (mask >> j) & 1]
+        on_time = [j for j in jobs if d[j] >= t_end]
+        if on_time:
+            # a job that is on time even as the last one can always go last
+            candidates = [max(on_time, key=lambda j: p[j])]
+        else:
+            candidates = sorted(jobs, key=lambda j: (self._cost(j, t_end), -p[j]))
+
+        for j in candidates:
+            cost = self._cost(j, t_end)
+            if next_job is not None:
+                # adjacent pairwise interchange with the job that follows
+                k = next_job
+                current = cost + self._cost(k, t_end + p[k])
+                swapped = self._cost(k, t_end - p[j] + p[k]) + self._cost(j, t_end + p[k])
+                if swapped < current:
+                    continue
+            self._tail.append(j)
+            self._branch(mask & ~(1 << j), t_end - p[j], tail_cost + cost, j)
+            self._tail.pop()
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+SOLVERS = {'gurobi': GurobiSolver,
+           'gurobi_incremental': IncrementalGurobiSolver,
+           'branch_and_bound': BranchAndBoundSolver}
+
+
+def get_solver(name=None):
+    if name is None:
+        name = OptimizationParameters.get_solver()
+    if name not in SOLVERS:
+        raise ValueError('unknown solver: {}'.format(name))
+    return SOLVERS[name]()
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import queue
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from simulation_environment import Simulation, STAT_NAMES
+from profiling import Profile
+from scenario import Scenario
+from rng import RandomStreams
+import shared_scenario
+import racing
+from utils.helpers import RunningStats
+
+# seconds per order of one replication, until measured ones are available
+DEFAULT_COSTS = {'FIFO': 2e-5, 'SPT': 2e-5, 'BWF': 2e-5, 'optimization': 1e-3}
+
+
+def _run_task(task):
+    point, i, config, descriptor = task
+    t = time.perf_counter()
+    scenario = None if descriptor is None else shared_scenario.attach(descriptor)
+    stats, profile = Simulation._split_result(Simulation.run_environment(config, scenario=scenario))
+    return point, i, stats, time.perf_counter() - t, profile
+
+
+class _Point(object):
+    def __init__(self, seed, kwargs):
+        """
+        replication state of one grid point, the seeds are the ones Simulation.run would use
+        """
+        self.kwargs = kwargs
+        self.simulation = Simulation(seed=seed, **kwargs)
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.running = {name: RunningStats() for name in STAT_NAMES}
+        self.results = {}
+        self.profiles = [] # of the replications that were run with profile=True
+        self.pending = []
+        self.configs = {} # configs of the replications in the pool
+        self.in_flight = 0
+        self.count = 0
+
+    def submit(self, wave) -> None:
+        seeds = self.seed_sequence.spawn(wave)
+        configs = self.simulation._get_configs(seeds)
+        self.pending += [(self.count + k, config) for k, config in enumerate(configs)]
+        self.count += wave
+
+    def add(self, i, result) -> None:
+        self.results[i] = result
+        for name, value in zip(STAT_NAMES, result):
+            self.running[name].add(value)
+
+    def summary(self, confidence) -> dict:
+        stats = {name:[self.results[i][k] for i in range(len(self.results))] for k, name in enumerate(STAT_NAMES)}
+        summary = pd.DataFrame(stats).describe().to_dict()
+        for name, stat in self.running.items():
+            summary[name]['half_width'] = stat.half_width(confidence)
+            summary[name]['relative_half_width'] = stat.relative_half_width(confidence)
+        if self.profiles:
+            summary['profile'] = Profile.merged(self.profiles).to_dict()
+        return summary
+
+
+class Sweep(object):
+    def __init__(self, seed, points, num_cores=-1, cost_file=None, store=None, share_scenarios=True):
+        """
+        runs the replications of every grid point (a dict of Simulation kwargs) on one pool,
+        the most expensive replications go first so the cores are not idle at the end,
+        costs per dispatching rule are learned from the finished replications and kept in cost_file,
+        replications found in store (a ResultStore) are not run again and new ones are added to it,
+        with share_scenarios the orders of a seed are generated once and shared with the workers
+        """
+        self.seed = seed
+        self.points = points
+        if num_cores <= 0:
+            self._num_cores = multiprocessing.cpu_count()
+        else:
+            self._num_cores = min(multiprocessing.cpu_count(), num_cores)
+        self._cost_file = cost_file
+        self._store = store
+        self._share_scenarios = share_scenarios
+        self._published = {}
+        self._costs = self._load_costs()
+        self._cost_counts = {rule: 0 for rule in self._costs}
+
+    def _load_costs(self) -> dict:
+        costs = DEFAULT_COSTS.copy()
+        if self._cost_file is not None and os.path.exists(self._cost_file):
+            with open(self._cost_file) as f:
+                costs.update(json.load(f))
+        return costs
+
+    def _save_costs(self) -> None:
+        if self._cost_file is None:
+            return
+        tmp_path = self._cost_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._costs, f, indent=2)
+        os.replace(tmp_path, self._cost_file)
+
+    def _learn_cost(self, kwargs, elapsed) -> None:
+        rule = kwargs['dispatching_rule']
+        cost = elapsed / kwargs['n']
+        if self._cost_counts.get(rule, 0) == 0:
+            # the first measurement replaces the default or the cost of an earlier sweep
+            self._costs[rule] = cost
+            self._cost_counts[rule] = 1
+            return
+        self._cost_counts[rule] += 1
+        self._costs[rule] += (cost - self._costs[rule]) / self._cost_counts[rule]
+
+    def _expected_cost(self, point) -> float:
+        kwargs = point.kwargs
+        return self._costs.get(kwargs['dispatching_rule'], max(self._costs.values())) * kwargs['n']
+
+    def _get_scenario(self, config):
+        """
+        descriptor of the shared scenario of the replication, scenarios only depend on the seed and n
+        """
+        if not self._share_scenarios or config.get('simulation_time') is not None:
+            return None
+        seed = config['seed']
+        key = (seed.entropy, seed.spawn_key, config['n'])
+        if key not in self._published:
+            scenario = Scenario(config['n'], RandomStreams(seed))
+            self._published[key] = shared_scenario.publish(scenario)
+        return self._published[key][1]
+
+    def _release_scenarios(self) -> None:
+        for block, _ in self._published.values():
+            block.close()
+            block.unlink()
+        self._published = {}
+
+    def _execute(self, pool, points, on_idle=None) -> None:
+        """
+        runs the pending replications of points on pool until none are pending or in flight,
+        on_idle(k) is called as soon as point k has none and may submit more
+        """
+        finished = queue.Queue()
+        in_flight = 0
+        while True:
+            # a couple of tasks per core keeps them busy while the order still follows the latest costs
+            while in_flight < 2 * self._num_cores:
+                waiting = [k for k, point in enumerate(points) if point.pending]
+                if not waiting:
+                    break
+                k = max(waiting, key=lambda k: self._expected_cost(points[k]))
+                i, config = points[k].pending.pop(0)
+                points[k].in_flight += 1
+                in_flight += 1
+                stats = None if self._store is None else self._store.get(config)
+                if stats is not None:
+                    finished.put((k, i, stats, None, None))
+                    continue
+                points[k].configs[i] = config
+                task = (k, i, config, self._get_scenario(config))
+                pool.apply_async(_run_task, (task,), callback=finished.put, error_callback=finished.put)
+            if in_flight == 0:
+                break
+
+            result = finished.get()
+            if isinstance(result, BaseException):
+                raise result
+            k, i, stats, elapsed, profile = result
+            in_flight -= 1
+            point = points[k]
+            point.in_flight -= 1
+            point.add(i, stats)
+            if profile is not None:
+                point.profiles.append(profile)
+            if elapsed is not None:
+                self._learn_cost(point.kwargs, elapsed)
+                if self._store is not None:
+                    self._store.put(point.configs.pop(i), stats, elapsed)
+
+            if on_idle is not None and not (point.pending or point.in_flight):
+                on_idle(k)
+
+    def run(self, n_sim=None, targets=None, min_sim=5, max_sim=100, confidence=0.95, callback=None) -> list:
+        """
+        n_sim replications per point, or with targets replications until the confidence intervals
+        are narrow enough as in Simulation.run_sequential, callback(kwargs, summary) is called as soon
+        as a point is finished, returns the summaries in the order of the points
+        """
+        points = [_Point(self.seed, kwargs) for kwargs in self.points]
+        for point in points:
+            point.simulation._set_num_cores(self._num_cores)
+            point.submit(min(min_sim, max_sim) if targets is not None else n_sim)
+
+        summaries = [None] * len(points)
+
+        def on_idle(k):
+            point = points[k]
+            wave = 0
+            if targets is not None:
+                wave = point.simulation._next_wave(point.running, targets, confidence, max_sim)
+            if wave > 0:
+                point.submit(wave)
+                return
+            summaries[k] = point.summary(confidence)
+            if callback is not None:
+                callback(point.kwargs, summaries[k])
+
+        try:
+            with multiprocessing.Pool(processes=self._num_cores) as pool:
+                self._execute(pool, points, on_idle)
+        finally:
+            self._release_scenarios()
+
+        self._save_costs()
+        return summaries
+
+    def race(self, objectives=('tardiness_proportion', 'rejection_proportion'), min_sim=2, max_sim=50, eta=2,
+             refine=3, confidence=0.95, callback=None):
+        """
+        racing over the points: every point runs min_sim replications, the points another one dominates
+        with confidence on the objectives are dropped and the budget of the others is multiplied by eta
+        up to max_sim, in the first refine rounds the policy parameter of the points on the frontier is bisected
+        with its neighbours (see racing.py), callback(kwargs, summary) is called as soon as a point is
+        dropped or finished, returns the points (the grid and the refined ones) and their summaries,
+        which have the number of replications and whether the point was dropped
+        """
+        points = [_Point(self.seed, kwargs) for kwargs in self.points]
+        alive = list(range(len(points)))
+        summaries = []
+
+        def finish(k, eliminated):
+            summary = points[k].summary(confidence)
+            summary['replications'] = points[k].count
+            summary['eliminated'] = eliminated
+            summaries.append((k, summary))
+            if callback is not None:
+                callback(points[k].kwargs, summary)
+
+        budget = min(min_sim, max_sim)
+        new = alive
+        try:
+            with multiprocessing.Pool(processes=self._num_cores) as pool:
+                while True:
+                    for k in new:
+                        points[k].simulation._set_num_cores(self._num_cores)
+                    for k in alive:
+                        if budget > points[k].count:
+                            points[k].submit(budget - points[k].count)
+                    self._execute(pool, points)
+
+                    dominated = racing.dominated(points, alive, objectives, confidence)
+                    for k in dominated:
+                        finish(k, eliminated=True)
+                    alive = [k for k in alive if k not in dominated]
+                    new = []
+                    if refine > 0:
+                        refine -= 1
+                        for kwargs in racing.refine(points, alive, objectives):
+                            points.append(_Point(self.seed, kwargs))
+                            new.append(len(points) - 1)
+                        alive += new
+                    if budget >= max_sim and not new:
+                        break
+                    budget = min(max_sim, budget * eta)
+        finally:
+            self._release_scenarios()
+
+        for k in alive:
+            finish(k, eliminated=False)
+        self._save_costs()
+        summaries = dict(summaries)
+        return [point.kwargs for point in points], [summaries[k] for k in range(len(points))]
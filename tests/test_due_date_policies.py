@@ -0,0 +1,21 @@
+import contextlib
+import io
+
+import pytest
+
+from horizon import BLOCK_SIZE
+from simulation_environment import Environment
+from utils.env_variables import CustomerParameters, ProductParameters
+
+
+@pytest.mark.parametrize('by', ['product', 'customer'])
+def test_qnt_keeps_one_sketch_per_type_across_blocks(by):
+    policy = {'policy': 'QNT', 'quantile': 0.8, 'half_life': 100, 'by': by}
+    env = Environment(n=1000, simulation_time=1000000, due_date_policy_params=policy, dispatching_rule='FIFO',
+                      seed=3, warmup=30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.run_once()
+    # the orders of the run span several blocks with products and customers of their own
+    assert env._order_stream.order_count > 2 * BLOCK_SIZE
+    types = len((ProductParameters if by == 'product' else CustomerParameters).get_probs())
+    assert len(env._due_date_assigner._sketches) == types
@@ -0,0 +1,26 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from lockstep import LockstepBatch
+from rng import get_replication_seeds
+from schedule import STATIC_RULES
+from simulation_environment import Environment
+
+POLICIES = [{'policy': 'CON', 'constant': 150}, {'policy': 'SLK', 'constant': 50}]
+
+
+@pytest.mark.parametrize('rule', STATIC_RULES)
+@pytest.mark.parametrize('policy', POLICIES, ids=[policy['policy'] for policy in POLICIES])
+def test_lockstep_matches_environment(rule, policy):
+    seeds = get_replication_seeds(7, 4)
+    batch = LockstepBatch(seeds, 1000, dict(policy), rule, 30)
+    for r, (seed, stats) in enumerate(zip(seeds, batch.run())):
+        env = Environment(n=1000, due_date_policy_params=dict(policy), dispatching_rule=rule, seed=seed, warmup=30)
+        with contextlib.redirect_stdout(io.StringIO()):
+            env.run_once()
+        np.testing.assert_array_equal(stats, env.collect_stats())
+        for column in ['due_date', 'start', 'finish']:
+            np.testing.assert_array_equal(getattr(batch, column)[r], getattr(env._order_table, column))
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from machines import MachineSet
+
+
+class Job(object):
+    def __init__(self, expected_process_time):
+        self._expected_process_time = expected_process_time
+
+
+def sorted_expected_start(machines, now, work):
+    # the fluid start from every machine at once
+    remaining = sorted((machines.remaining(k, now), machines.speeds[k]) for k in range(machines.count))
+    speed, weighted, start = 0, 0, remaining[0][0]
+    for i, (r, s) in enumerate(remaining):
+        speed += s
+        weighted += s * r
+        start = (work + weighted) / speed
+        if i + 1 == len(remaining) or start <= remaining[i + 1][0]:
+            break
+    return remaining[0][0], start
+
+
+@pytest.mark.parametrize('speeds', [[1] * 8, [1, 0.5, 0.25, 2, 1.5]])
+def test_heap_answers_match_a_scan_over_the_machines(speeds):
+    rng = random.Random(3)
+    machines = MachineSet(speeds)
+    now = 0
+    for _ in range(500):
+        now += rng.random() * 5
+        k = rng.randrange(machines.count)
+        if machines.jobs[k] is None:
+            p = rng.randrange(1, 40)
+            machines.start(k, Job(p), now, now + p / speeds[k] * rng.uniform(0.8, 1.2))
+        elif machines.finishes[k] <= now:
+            machines.finish(k)
+        assert machines.first_remaining(now) == pytest.approx(min(machines.remaining(k, now)
+                                                                  for k in range(machines.count)))
+        work = rng.random() * 100
+        assert machines.expected_start(now, work) == pytest.approx(sorted_expected_start(machines, now, work))
@@ -0,0 +1,24 @@
+import os
+import shutil
+
+import result_store
+
+
+def copy_tree(tmp_path):
+    for name in os.listdir(result_store.ROOT):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(result_store.ROOT, name), tmp_path / name)
+    shutil.copytree(os.path.join(result_store.ROOT, 'utils'), tmp_path / 'utils')
+
+
+def test_code_version_ignores_grids_and_tooling(tmp_path, monkeypatch):
+    copy_tree(tmp_path)
+    monkeypatch.setattr(result_store, 'ROOT', str(tmp_path))
+    version = result_store.get_code_version()
+    for path in ['utils/model_params.py', 'utils/pareto.py', 'racing.py', 'profiling.py', 'lockstep.py']:
+        with open(tmp_path / path, 'a') as f:
+            f.write('\n# edited\n')
+    assert result_store.get_code_version() == version
+    with open(tmp_path / 'utils' / 'env_variables.py', 'a') as f:
+        f.write('\n# edited\n')
+    assert result_store.get_code_version() != version
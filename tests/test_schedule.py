@@ -0,0 +1,30 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from schedule import STATIC_RULES
+from simulation_environment import Environment
+
+POLICIES = [{'policy': 'CON', 'constant': 150}, {'policy': 'SLK', 'constant': 50},
+            {'policy': 'TWK', 'moving_avg_window': 50}, {'policy': 'QNT', 'quantile': 0.8, 'half_life': 100}]
+
+
+def run(incremental_queue, rule, policy, seed=5):
+    env = Environment(n=1500, due_date_policy_params=dict(policy), dispatching_rule=rule, seed=seed, warmup=30,
+                      incremental_queue=incremental_queue)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.run_once()
+    return env
+
+
+@pytest.mark.parametrize('rule', STATIC_RULES)
+@pytest.mark.parametrize('policy', POLICIES, ids=[policy['policy'] for policy in POLICIES])
+def test_incremental_queue_matches_sorting(rule, policy):
+    incremental, sorted_ = run(True, rule, policy), run(False, rule, policy)
+    assert incremental._queue._incremental and not sorted_._queue._incremental
+    np.testing.assert_array_equal(incremental.collect_stats(), sorted_.collect_stats())
+    for column in ['due_date', 'start', 'finish']:
+        np.testing.assert_array_equal(getattr(incremental._order_table, column),
+                                      getattr(sorted_._order_table, column))
@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+import shared_scenario
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SWEEP = '''
+import multiprocessing
+import sys
+
+from sweep import Sweep
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method(sys.argv[1])
+    points = [{'n': 200, 'due_date_policy_params': {'policy': 'CON', 'constant': constant},
+               'dispatching_rule': 'FIFO', 'warmup': 10} for constant in (150, 300)]
+    Sweep(seed=3, points=points, num_cores=2).run(n_sim=2)
+'''
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn', 'forkserver'])
+def test_sweep_leaves_resource_tracker_quiet(start_method, tmp_path):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f'{start_method} is not available')
+    script = tmp_path / 'sweep_script.py'
+    script.write_text(SWEEP)
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, str(script), start_method], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ''
+
+
+def test_tracker_without_private_attributes_is_not_shared(monkeypatch):
+    monkeypatch.setattr(shared_scenario.resource_tracker, '_resource_tracker', object())
+    assert shared_scenario._tracker_pid() is None
+    assert not shared_scenario._shares_tracker({'tracker': None})
@@ -0,0 +1,55 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from simulation_environment import Environment, Simulation, STAT_NAMES
+from utils.helpers import RunningStats
+
+POLICIES = [{'policy': 'CON', 'constant': 150}, {'policy': 'SLK', 'constant': 50},
+            {'policy': 'TWK', 'moving_avg_window': 50}]
+
+
+def run(lazy_events, rule, policy, n=1500, seed=5, **kwargs):
+    env = Environment(n=n, due_date_policy_params=dict(policy), dispatching_rule=rule, seed=seed, warmup=30,
+                      lazy_events=lazy_events, **kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.run_once()
+    return env
+
+
+def assert_same_run(env, other):
+    np.testing.assert_array_equal(env.collect_stats(), other.collect_stats())
+    for column in ['due_date', 'start', 'finish']:
+        np.testing.assert_array_equal(getattr(env._order_table, column), getattr(other._order_table, column))
+
+
+@pytest.mark.parametrize('rule', ['FIFO', 'SPT', 'BWF'])
+@pytest.mark.parametrize('policy', POLICIES, ids=[policy['policy'] for policy in POLICIES])
+def test_lazy_events_match_eager_events(rule, policy):
+    assert_same_run(run(True, rule, policy), run(False, rule, policy))
+
+
+def test_lazy_events_match_eager_events_with_optimization():
+    policy = {'policy': 'CON', 'constant': 150}
+    assert_same_run(run(True, 'optimization', policy, n=200, solver='branch_and_bound'),
+                    run(False, 'optimization', policy, n=200, solver='branch_and_bound'))
+
+
+def test_next_wave_skips_nan_samples():
+    simulation = Simulation(seed=3, n=100, due_date_policy_params={'policy': 'CON', 'constant': 150},
+                            dispatching_rule='FIFO', warmup=30)
+    simulation._set_num_cores(1)
+    running = {name: RunningStats() for name in STAT_NAMES}
+    for k in range(4):
+        for name in STAT_NAMES:
+            running[name].add(0.1 * (k + 1))
+    # no tardy orders in any replication, the average tardiness is 0 / 0
+    running['weighted_avg_tardiness_amount'] = RunningStats()
+    for _ in range(4):
+        running['weighted_avg_tardiness_amount'].add(float('nan'))
+    assert running['weighted_avg_tardiness_amount'].missing == 4
+    wave = simulation._next_wave(running, {'weighted_avg_tardiness_amount': 0.05}, 0.95, max_sim=50)
+    assert wave == 1
+    assert simulation._next_wave(running, {'weighted_avg_tardiness_amount': 0.05}, 0.95, max_sim=4) == 0
@@ -1,4 +1,5 @@
-from scipy.stats import uniform, expon
+import numpy as np
+from scipy.stats import uniform, expon, norm
 
 from .helpers import Rounder
 
@@ -12,8 +13,8 @@ class ProductParameters(object):
         return unit_process_times[prod_id], unit_profits[prod_id]
     
     @staticmethod
-    def get_uncertainty_multiplier():
-        return uniform.rvs(loc=0.5, scale=1, size=1)[0]
+    def get_uncertainty_multipliers(size, rng=None):
+        return uniform.rvs(loc=0.5, scale=1, size=size, random_state=rng)
     
     @staticmethod
     def get_probs():
@@ -28,10 +29,15 @@ class CustomerParameters(object):
         return reliabilities[customer_id], rejection_coefficients[customer_id], weight_coefficients[customer_id]
     
     @staticmethod
-    def get_cancelation_time(customer_id):
-        mean_cancelation_times = {0: 6, 1: 8}
-        mean_cancelation_time = mean_cancelation_times[customer_id]
-        return Rounder.round(expon.rvs(loc=mean_cancelation_time, size=1))[0]
+    def get_weight_coefficients(customer_ids, rng=None):
+        weight_coefficients = np.array([CustomerParameters.get_params(i)[2] for i in range(len(CustomerParameters.get_probs()))])
+        mean, std = weight_coefficients[customer_ids].T
+        return norm.rvs(loc=mean, scale=std, random_state=rng)
+
+    @staticmethod
+    def get_cancelation_times(customer_ids, rng=None):
+        mean_cancelation_times = np.array([6, 8]) # indexed by customer id
+        return Rounder.round(expon.rvs(loc=mean_cancelation_times[customer_ids], random_state=rng))
 
     @staticmethod
     def get_probs():
@@ -43,13 +49,21 @@ class OrderParameters(object):
         return {(0,0):(30, 1.4), (0,1):(32, 1.9),
                 (1,0):(15, 2.8), (1,1):(16, 2.2),
                 (2,0):(9, 4.5), (2,1):(12, 0.9)}
+
+    @staticmethod
+    def get_quantities(prod_ids, customer_ids, rng=None):
+        order_quantity_dist = OrderParameters.get_quantity_dist()
+        dist = np.array([[order_quantity_dist[(prod_id, customer_id)] for customer_id in range(len(CustomerParameters.get_probs()))]
+                         for prod_id in range(len(ProductParameters.get_probs()))])
+        mean, std = dist[prod_ids, customer_ids].T
+        return np.round(norm.rvs(loc=mean, scale=std, random_state=rng), 0)
     
     @staticmethod
-    def get_interarrivals(size, get_mean=False):
+    def get_interarrivals(size, get_mean=False, rng=None):
         mean = 10 # mean interarrival time
         if get_mean:
             return mean
-        return Rounder.round(expon.rvs(loc=mean, size=size))
+        return Rounder.round(expon.rvs(loc=mean, size=size, random_state=rng))
 
 class OptimizationParameters(object):
     @staticmethod
@@ -60,3 +74,24 @@ class OptimizationParameters(object):
     def get_opt_gap():
         return 0.3
 
+    @staticmethod
+    def get_solver():
+        # 'gurobi', 'gurobi_incremental' (one persistent model per queue) or 'branch_and_bound'
+        return 'gurobi'
+
+    @staticmethod
+    def get_node_limit():
+        return 200000
+
+    @staticmethod
+    def get_time_limit():
+        # seconds per solve
+        return 5
+
+    @staticmethod
+    def get_cache_entries():
+        return 100000
+
+    @staticmethod
+    def get_cache_bytes():
+        return 256 * 2**20
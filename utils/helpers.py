@@ -1,5 +1,9 @@
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from scipy.stats import t as student_t
+
+from utils.pareto import pareto_front
 
 class Rounder(object):
     @staticmethod
@@ -7,24 +11,67 @@ class Rounder(object):
         decimals = 1
         arr = np.power(10, decimals) * np.round(arr, decimals=decimals)
         return arr.astype(int)
+
+
+class RunningStats(object):
+    def __init__(self):
+        """
+        mean and variance of a stream of values (welford's algorithm), nan values (e.g. an average tardiness
+        of a replication without tardy orders) are counted in missing and left out of the mean and variance
+        """
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x) -> None:
+        if np.isnan(x):
+            self.missing += 1
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    def variance(self) -> float:
+        if self.count < 2:
+            return float('nan')
+        return self._m2 / (self.count - 1)
+
+    def half_width(self, confidence=0.95) -> float:
+        """
+        half width of the student t confidence interval of the mean
+        """
+        if self.count < 2:
+            return float('inf')
+        return student_t.ppf((1 + confidence) / 2, self.count - 1) * np.sqrt(self.variance() / self.count)
+
+    def relative_half_width(self, confidence=0.95) -> float:
+        half_width = self.half_width(confidence)
+        if half_width == 0:
+            return 0.0
+        if self.mean == 0:
+            return float('inf')
+        return half_width / abs(self.mean)
+
     
 def extend_stats(row, stat):
     return row['tardiness_proportion'][stat], row['rejection_proportion'][stat], row['weighted_tardiness_proportion'][stat], row['weighted_rejection_proportion'][stat], row['avg_tardiness_amount'][stat], row['weighted_avg_tardiness_amount'][stat]
 
-def pareto_optimum(row, df):
-    mask1 = df['tardiness_proportion'] < row['tardiness_proportion']
-    mask2 = df[mask1]['rejection_proportion'] < row['rejection_proportion']
-    
-    mask3 = df['weighted_tardiness_proportion'] < row['weighted_tardiness_proportion']
-    mask4 = df[mask3]['weighted_rejection_proportion'] < row['weighted_rejection_proportion']
-    
-    mask5 = df['avg_tardiness_amount'] < row['avg_tardiness_amount']
-    mask6 = df[mask5]['rejection_proportion'] < row['rejection_proportion']
-    
-    mask7 = df['weighted_avg_tardiness_amount'] < row['weighted_avg_tardiness_amount']
-    mask8 = df[mask7]['weighted_rejection_proportion'] < row['weighted_rejection_proportion']
-    
-    return mask2.sum() == 0, mask4.sum() == 0, mask6.sum() == 0, mask8.sum() == 0
+# the objective pairs of the frontiers plot_frontier draws, by the column that marks the frontier
+FRONTIERS = {'pareto_opt1': ('tardiness_proportion', 'rejection_proportion'),
+             'pareto_opt_weighted1': ('weighted_tardiness_proportion', 'weighted_rejection_proportion'),
+             'pareto_opt2': ('avg_tardiness_amount', 'rejection_proportion'),
+             'pareto_opt_weighted2': ('weighted_avg_tardiness_amount', 'weighted_rejection_proportion')}
+
+
+def pareto_optimum(df) -> pd.DataFrame:
+    """
+    the FRONTIERS columns of the rows of df, a row is on a frontier if no other row is smaller
+    in both objectives (see utils/pareto.py for ranks and any number of objectives)
+    """
+    return pd.DataFrame({column: pareto_front(df[list(objectives)].to_numpy(dtype=np.float64), strict=True)
+                         for column, objectives in FRONTIERS.items()}, index=df.index)
 
 
 def plot_frontier(results, type):
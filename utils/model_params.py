@@ -6,6 +6,25 @@ def get_simulation_params():
     n_sim = 10
     return seed, n, simulation_time, warmup, n_sim
 
+def get_stopping_params():
+    # relative confidence interval half widths to replicate until, None runs n_sim replications,
+    # e.g. {'tardiness_proportion': 0.05, 'rejection_proportion': 0.05}
+    targets = None
+    min_sim = 5
+    max_sim = 50
+    confidence = 0.95
+    return targets, min_sim, max_sim, confidence
+
+def get_racing_params():
+    # racing runs every point min_sim replications and drops the ones another point beats with confidence
+    # on both objectives, the budget of the others grows by eta per round up to max_sim of the stopping params,
+    # the due date policy parameters on the frontier are bisected in the first refine rounds
+    racing = False
+    min_sim = 2
+    eta = 2
+    refine = 3
+    return racing, min_sim, eta, refine
+
 def dispatching_rule_grid():
     dispatching_rules = ['FIFO', 'SPT', 'BWF', 'optimization']
     for dispatching_rule in dispatching_rules:
@@ -15,10 +34,13 @@ def due_date_policy_grid():
     con_grid = [{'policy':'CON', 'constant':50*k} for k in range(3, 11)]
     slk_grid = [{'policy':'SLK', 'constant':25*k} for k in range(2, 11)]
     twk_grid = [{'policy':'TWK', 'moving_avg_window':50*k} for k in range(1, 4)]
+    qnt_grid = [{'policy':'QNT', 'quantile':k/10, 'half_life':100} for k in range(5, 10)]
     
     for con_combination in con_grid:
         yield con_combination
     for slk_combination in slk_grid:
         yield slk_combination
     for twk_combination in twk_grid:
-        yield twk_combination
\ No newline at end of file
+        yield twk_combination
+    for qnt_combination in qnt_grid:
+        yield qnt_combination
\ No newline at end of file
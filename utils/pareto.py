@@ -0,0 +1,163 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# points ranked together in one block, and the number of comparisons held in memory at once
+BLOCK_SIZE = 256
+_MAX_ELEMENTS = 1 << 22
+
+
+def _dominates(front, points, strict) -> np.ndarray:
+    """
+    matrix of front rows (columns) dominating points (rows)
+    """
+    # one objective at a time, reducing over a short last axis is slow
+    dominates = np.ones((len(points), len(front)), dtype=bool)
+    better = np.zeros((len(points), len(front)), dtype=bool)
+    for j in range(points.shape[1]):
+        if strict:
+            dominates &= front[:, j] < points[:, j, None]
+            continue
+        dominates &= front[:, j] <= points[:, j, None]
+        better |= front[:, j] < points[:, j, None]
+    return dominates if strict else dominates & better
+
+
+class _Front(object):
+    def __init__(self, members, strict):
+        """
+        the points of one front, with three objectives and weak dominance also sorted on the second
+        objective with the running minimum of the third, which answers a dominance query by bisection
+        (the members come before the queried points in lexicographic order, so the first objective is never larger)
+        """
+        self.members = members
+        self._strict = strict
+        self._staircase = members.shape[1] == 3 and not strict
+        self._index()
+
+    def _index(self) -> None:
+        if not self._staircase:
+            return
+        order = np.argsort(self.members[:, 1], kind='stable')
+        self._second = self.members[order, 1]
+        self._third = np.minimum.accumulate(self.members[order, 2])
+
+    def add(self, members) -> None:
+        self.members = np.vstack([self.members, members])
+        self._index()
+
+    def dominates(self, points) -> np.ndarray:
+        """
+        mask of the points some member dominates
+        """
+        if self._staircase:
+            count = np.searchsorted(self._second, points[:, 1], side='right')
+            return (count > 0) & (self._third[np.maximum(count - 1, 0)] <= points[:, 2])
+        # compared in chunks of members to bound the memory
+        dominated = np.zeros(len(points), dtype=bool)
+        step = max(1, _MAX_ELEMENTS // (len(points) * points.shape[1]))
+        for start in range(0, len(self.members), step):
+            open_ = np.flatnonzero(~dominated)
+            if not len(open_):
+                break
+            dominated[open_] = _dominates(self.members[start:start + step], points[open_], self._strict).any(axis=1)
+        return dominated
+
+
+def _ranks_2d(points, strict):
+    """
+    fronts of two objectives, the (unique) points come sorted on the first objective so a front dominates
+    the point if the smallest second objective in the front is small enough, found by bisection
+    """
+    ranks = np.empty(len(points), dtype=np.int64)
+    front_min = [] # smallest second objective per front, non decreasing over the fronts
+    first, second = points[:, 0], points[:, 1]
+    i = 0
+    while i < len(points):
+        # points with the same first objective are ranked before any of them joins a front,
+        # with strict dominance they cannot dominate each other
+        j = i + 1
+        if strict:
+            while j < len(points) and first[j] == first[i]:
+                j += 1
+        fronts = [bisect_left(front_min, second[k]) if strict else bisect_right(front_min, second[k]) for k in range(i, j)]
+        for k, front in zip(range(i, j), fronts):
+            if front == len(front_min):
+                front_min.append(second[k])
+            else:
+                front_min[front] = min(front_min[front], second[k])
+            ranks[k] = front
+        i = j
+    return ranks
+
+
+def non_dominated_ranks(points, strict=False) -> np.ndarray:
+    """
+    front of every point when all objectives (the columns of points) are minimized, 0 is the pareto front,
+    a point is dominated if another one is at most as large in every objective and smaller in one,
+    with strict if another one is smaller in every objective
+
+    the points are sorted lexicographically so dominating points come first, and each point joins the first
+    front that does not dominate it, found by binary search over the fronts (efficient non-dominated sort),
+    with more than two objectives the points are taken in blocks that are searched together
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2:
+        raise ValueError('points must be a (points, objectives) array')
+    n, m = points.shape
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    # equal points share their rank, the unique points come sorted lexicographically
+    points, inverse = np.unique(points, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    if m == 1:
+        return np.arange(len(points))[inverse]
+    if m == 2:
+        return _ranks_2d(points, strict)[inverse]
+    n = len(points)
+
+    ranks = np.empty(n, dtype=np.int64)
+    fronts = []
+    block_size = max(1, min(BLOCK_SIZE, int(np.sqrt(_MAX_ELEMENTS / m))))
+    for start in range(0, n, block_size):
+        block = np.arange(start, min(start + block_size, n))
+        block_points = points[block]
+        # first front that does not dominate the point, binary searched for all points of the block at once
+        low, high = np.zeros(len(block), dtype=np.int64), np.full(len(block), len(fronts))
+        while (low < high).any():
+            searching = np.flatnonzero(low < high)
+            middle = (low[searching] + high[searching]) // 2
+            for front in np.unique(middle):
+                selected = searching[middle == front]
+                dominated = fronts[front].dominates(block_points[selected])
+                low[selected[dominated]] = front + 1
+                high[selected[~dominated]] = front
+        # points of the block dominate only later points of the block, one front behind them at least
+        inner = _dominates(block_points, block_points, strict)
+        block_ranks = low
+        for i in range(1, len(block)):
+            dominators = inner[i, :i]
+            if dominators.any():
+                block_ranks[i] = max(block_ranks[i], block_ranks[:i][dominators].max() + 1)
+        ranks[block] = block_ranks
+        for front in np.unique(block_ranks):
+            members = block_points[block_ranks == front]
+            if front == len(fronts):
+                fronts.append(_Front(members, strict))
+            else:
+                fronts[front].add(members)
+    return ranks[inverse]
+
+
+def pareto_front(points, strict=False) -> np.ndarray:
+    """
+    mask of the points that no other point dominates
+    """
+    return non_dominated_ranks(points, strict=strict) == 0
+
+
+def frontier_ranks(df, objectives, strict=False) -> np.ndarray:
+    """
+    non_dominated_ranks of the rows of a DataFrame on the given objective columns
+    """
+    return non_dominated_ranks(df[list(objectives)].to_numpy(dtype=np.float64), strict=strict)